@@ -0,0 +1,282 @@
+"""
+Contains all classes and functions necessary to check that a candidate
+simulation engine is statistically equivalent to the reference, agent-based
+model over many seeds and parameter sets.
+
+An engine is any callable taking (params, seed, max_steps) and returning a
+Sample: a dictionary holding the generated contact graph in compressed sparse
+row form ("indptr" and "indices") and the per-step series of population
+counts ("series", laid out as in runner.SERIES_COLUMNS).  Either may be None
+if the engine does not produce it, in which case the metrics derived from it
+are not compared.
+"""
+import hashlib
+
+import numpy as np
+
+from .model import TelephoneModel
+from .partition import PartitionedSimulation, contacts_to_csr
+from .runner import SERIES_COLUMNS, series_of, simulate
+
+
+CHECKPOINTS = (1, 2, 4, 8)
+"""
+The steps at which the per-step population counts are compared.
+"""
+
+DEGREE_SAMPLES = 64
+"""
+The most people per run whose number of contacts is compared, so that the
+cost of comparing degree sequences does not grow with the population.
+"""
+
+
+def candidate_seed(seed):
+    """
+    Returns the seed the candidate engine is run with in place of the
+    specified reference seed.
+
+    Deriving a distinct seed gives the candidate its own population and
+    social networks, so that its samples are independent of (rather than
+    paired with) the reference's, as the tests assume.
+
+    :param seed: The reference seed.
+    :return: The candidate seed.
+    """
+    digest = hashlib.sha256("candidate:{}".format(seed).encode()).digest()
+    return int.from_bytes(digest[:4], "little")
+
+
+def degrees(sample):
+    """
+    Returns the number of contacts of each person in the specified sample.
+
+    :param sample: The sample to use.
+    :return: An array of contact counts.
+    """
+    return np.diff(sample["indptr"])
+
+
+def ks_test(a, b):
+    """
+    Performs an exact two-sample Kolmogorov-Smirnov permutation test of
+    whether the specified samples are drawn from the same distribution.
+
+    Under the null hypothesis every assignment of the pooled values to the
+    two samples is equally likely.  Taking the pooled values in sorted order,
+    such an assignment is a lattice path that takes one step for each value,
+    and the KS statistic of the assignment is only evaluated where a run of
+    tied values ends.  The p-value is the probability that such a path strays
+    at least as far from the diagonal as the observed one does at one of
+    those points.  It is computed by propagating the distribution of the
+    number of values taken from the first sample along the path.
+
+    This is exact for the discrete samples compared here, which have many
+    ties, and unlike sampling random relabellings its p-values have no
+    floor, so they stay meaningful however many tests a Bonferroni
+    correction is spread over.  It takes time proportional to the product
+    of the pooled and first sample sizes, but only memory proportional to
+    the first.
+
+    :param a: The first sample.
+    :param b: The second sample.
+    :return: A tuple of the KS statistic and its p-value.
+    """
+    m, n = len(a), len(b)
+    values, counts = np.unique(np.concatenate((a, b)), return_counts=True)
+    ends = np.cumsum(counts)
+
+    first = np.cumsum(np.bincount(np.searchsorted(values, a),
+                                  minlength=len(values)))
+    observed = np.max(np.abs(first / m - (ends - first) / n))
+    threshold = observed - 1e-12
+
+    taken = np.arange(m + 1)
+    probability = np.zeros(m + 1)
+    probability[0] = 1.0
+    p_value = 0.0
+    start = 0
+
+    for end in ends:
+        for step in range(start, end):
+            move = (m - taken) / (m + n - step)
+            probability[1:] = probability[1:] * (1.0 - move[1:]) + \
+                probability[:-1] * move[:-1]
+            probability[0] *= 1.0 - move[0]
+        start = end
+
+        strayed = np.abs(taken / m - (end - taken) / n) >= threshold
+        p_value += probability[strayed].sum()
+        probability[strayed] = 0.0
+
+    return float(observed), float(p_value / (p_value + probability.sum()))
+
+
+def metrics(sample, rng=None):
+    """
+    Returns every comparable metric of the specified sample.
+
+    Each metric is a list of observations: the degree sequence contributes
+    one observation per person (for at most DEGREE_SAMPLES people chosen at
+    random), whereas the reciprocity rate, final number of knowing people,
+    time to quiescence and the population counts at each of CHECKPOINTS
+    contribute one observation per run.
+
+    :param sample: The sample to use.
+    :param rng: The NumPy random generator to choose people with.
+    :return: A dictionary of observations, keyed by metric.
+    """
+    result = {}
+
+    if sample.get("indptr") is not None:
+        if rng is None:
+            rng = np.random.default_rng(0)
+
+        people = degrees(sample)
+        if len(people) > DEGREE_SAMPLES:
+            people = rng.choice(people, DEGREE_SAMPLES, replace=False)
+        result["degree"] = people.tolist()
+        result["reciprocity"] = [reciprocity(sample)]
+
+    series = sample.get("series")
+    if series is not None:
+        result["knowing"] = [int(series[-1, SERIES_COLUMNS.index("knowing")])]
+        result["quiescence"] = [len(series) - 1]
+        for step in CHECKPOINTS:
+            row = series[min(step, len(series) - 1)]
+            for column in ("knowing", "searching", "reporting"):
+                name = "{}@{}".format(column, step)
+                result[name] = [int(row[SERIES_COLUMNS.index(column)])]
+
+    return result
+
+
+def partitioned_engine(params, seed, max_steps):
+    """
+    Runs the partitioned simulation (in a single shard) on a population and
+    social networks generated by the reference model.
+
+    :param params: The model parameters to use.
+    :param seed: The seed to use.
+    :param max_steps: The maximum number of steps to run for.
+    :return: A new sample.
+    """
+    model = TelephoneModel(seed, **params)
+    simulation = PartitionedSimulation.from_model(model, shards=1)
+
+    return {"indptr": simulation.indptr, "indices": simulation.indices,
+            "series": simulation.run(max_steps)}
+
+
+def reciprocity(sample):
+    """
+    Returns the fraction of contacts in the specified sample that are
+    reciprocated, i.e. for which the contact also knows the person.
+
+    :param sample: The sample to use.
+    :return: The reciprocity rate, or zero if there are no contacts.
+    """
+    indptr, indices = sample["indptr"], sample["indices"]
+    if not len(indices):
+        return 0.0
+
+    num_people = len(indptr) - 1
+    sources = np.repeat(np.arange(num_people), np.diff(indptr))
+    edges = np.unique(sources * num_people + indices)
+    reverse = indices * num_people + sources
+    return float(np.count_nonzero(np.isin(reverse, edges))) / len(indices)
+
+
+def reference_engine(params, seed, max_steps):
+    """
+    Runs the reference, agent-based model.
+
+    :param params: The model parameters to use.
+    :param seed: The seed to use.
+    :param max_steps: The maximum number of steps to run for.
+    :return: A new sample.
+    """
+    model = simulate(params, seed, max_steps)
+    indptr, indices = contacts_to_csr([p.contacts for p in model.people])
+    return {"indptr": indptr, "indices": indices, "series": series_of(model)}
+
+
+def compare(candidate, param_sets, seeds, max_steps=200, alpha=0.01,
+            reference=reference_engine):
+    """
+    Runs the reference and candidate engines over every parameter set and
+    seed, and tests each metric's distributions for equality.
+
+    The candidate is run with candidate_seed() of each seed, so its runs are
+    independent of the reference's.
+
+    :param candidate: The candidate engine to check.
+    :param param_sets: The model parameters to check.
+    :param seeds: The seeds to run each engine with.
+    :param max_steps: The maximum number of steps of each run.
+    :param alpha: The family-wise significance level.
+    :param reference: The reference engine to check against.
+    :return: A new equivalence report.
+    """
+    report = EquivalenceReport(alpha)
+    rng = np.random.default_rng(0)
+
+    for index, params in enumerate(param_sets):
+        expected, actual = {}, {}
+        for seed in seeds:
+            for observed, engine, run_seed in (
+                    (expected, reference, seed),
+                    (actual, candidate, candidate_seed(seed))):
+                sample = engine(params, run_seed, max_steps)
+                for name, values in metrics(sample, rng).items():
+                    observed.setdefault(name, []).extend(values)
+
+        for name in sorted(set(expected) & set(actual)):
+            statistic, p_value = ks_test(expected[name], actual[name])
+            report.results.append((index, name, statistic, p_value))
+
+    return report
+
+
+class EquivalenceReport:
+    """
+    Represents the outcome of comparing a candidate engine to the reference.
+
+    Every (parameter set, metric) pair is a separate test, so a Bonferroni
+    correction is applied: a test fails if its p-value is below alpha divided
+    by the number of tests.
+
+    Attributes:
+        alpha (float): The family-wise significance level.
+        results (list): A tuple of the parameter set index, metric name, KS
+        statistic and p-value of each test.
+    """
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.results = []
+
+    def __str__(self):
+        lines = ["{:>3} {:<16} D={:.3f} p={:.4f}{}".format(
+            index, name, statistic, p_value,
+            " FAIL" if (index, name, statistic, p_value) in self.failures()
+            else "")
+            for index, name, statistic, p_value in self.results]
+        return "\n".join(lines)
+
+    def failures(self):
+        """
+        Returns every test whose distributions differ significantly.
+
+        :return: A list of failed test results.
+        """
+        threshold = self.alpha / max(1, len(self.results))
+        return [result for result in self.results if result[3] < threshold]
+
+    def passed(self):
+        """
+        Returns whether or not the candidate is equivalent to the reference.
+
+        :return: Whether or not no test failed.
+        """
+        return not self.failures()
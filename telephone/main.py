@@ -6,7 +6,7 @@ formed from telephone contact lists used to search for information.
 """
 import sys
 
-from .server import server
+from .server import create_server
 
 
 def main():
@@ -15,6 +15,7 @@ def main():
 
     :return: An exit code.
     """
+    server = create_server()
     server.port = 8521
     server.launch()
 
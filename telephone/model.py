@@ -2,16 +2,16 @@
 Contains all classes and functions related to the core model used in this
 project.
 """
-from random import random
+from random import random, seed as seed_random
 
 import numpy as np
 from mesa import Model
-from mesa.datacollection import DataCollector
 from mesa.space import SingleGrid
 from mesa.time import RandomActivation
 
-from .network_gen import NetworkGenerator
+from .network_gen import NetworkGenerator, generate_network
 from .person import Person
+from .sketch import LatencySketch
 
 
 def is_malicious(model):
@@ -67,20 +67,34 @@ class TelephoneModel(Model):
     composed of a virtual population's aggregate social networks, wherein
     individuals seek to use those they know in search of "knowledge" in the form
     of a piece of boolean data.
+
+    Alongside the population counts, this simulation tracks how long each
+    search took to resolve (search latency) and how long each answer took to
+    be reported back to its requester (report latency).  The step at which
+    each person's most recent search and report started and ended is kept in
+    the preallocated arrays search_start, search_end, report_start and
+    report_end (-1 if none), and every completed latency is added to the
+    streaming sketches search_latency and report_latency.  A report dropped by
+    a malicious person is never delivered and so is not counted.
     """
 
     def __init__(self, seed, **kwargs):
         super().__init__(seed)
+        self.seed_randomizers(seed)
         self.collector = None
         self.data = {"knowing": 0, "reporting": 0, "searching": 0, "waiting": 0}
         self.grid = SingleGrid(kwargs["width"], kwargs["height"], False)
         self.params = kwargs
         self.people = []
+        self.report_latency = LatencySketch()
         self.schedule = RandomActivation(self)
+        self.search_latency = LatencySketch()
 
         self.create_people()
         self.create_networks()
+        self.create_latency_arrays()
         self.create_data_collector()
+        self.compute_data()
 
     def __getattr__(self, item):
         if item == "steps":
@@ -93,24 +107,74 @@ class TelephoneModel(Model):
         Updates this simulation's internal data cache, computing all relevant
         model data metrics for a single step.
         """
-        self.data["knowing"] = self.data["reporting"] = \
-            self.data["searching"] = self.data["waiting"] = 0
+        count = len(self.people)
+        states = np.fromiter((p.state.value for p in self.people), np.int8,
+                             count)
 
-        for person in self.people:
-            if person.data:
-                self.data["knowing"] += 1
-            if person.is_reporting():
-                self.data["reporting"] += 1
-            elif person.is_searching():
-                self.data["searching"] += 1
-            else:
-                self.data["waiting"] += 1
+        self.data["knowing"] = int(np.count_nonzero(
+            np.fromiter((p.data for p in self.people), np.bool_, count)))
+        self.data["reporting"] = int(np.count_nonzero(
+            states == Person.State.Reporting.value))
+        self.data["searching"] = int(np.count_nonzero(
+            states == Person.State.Searching.value))
+        self.data["waiting"] = count - self.data["reporting"] - \
+            self.data["searching"]
+
+        self.compute_latencies(states)
+
+    def compute_latencies(self, states):
+        """
+        Records every search and report that started or ended since the
+        last time this simulation's data was computed and adds the latency of
+        each one that ended to the appropriate sketch.
+
+        :param states: The current state value of each person.
+        """
+        reporting = Person.State.Reporting.value
+        searching = Person.State.Searching.value
+        previous, self.states = self.states, states
+
+        began = (states == searching) & (previous != searching)
+        ended = (previous == searching) & (states != searching)
+        self.search_start[began] = self.steps
+        self.search_end[began] = -1
+        self.search_end[ended] = self.steps
+        self.search_latency.add(self.steps - self.search_start[ended])
+
+        began = (states == reporting) & (previous != reporting)
+        ended = (previous == reporting) & (states != reporting)
+        self.report_start[began] = self.steps
+        self.report_end[began] = -1
+        ended &= ~self.malicious
+        self.report_end[ended] = self.steps
+        self.report_latency.add(self.steps - self.report_start[ended])
+
+    def create_latency_arrays(self):
+        """
+        Creates the per-person arrays used to track search and report
+        latencies.
+        """
+        count = len(self.people)
+
+        self.malicious = np.fromiter((p.malicious for p in self.people),
+                                     np.bool_, count)
+        self.report_end = np.full(count, -1, np.int64)
+        self.report_start = np.full(count, -1, np.int64)
+        self.search_end = np.full(count, -1, np.int64)
+        self.search_start = np.full(count, -1, np.int64)
+        self.states = np.full(count, Person.State.Waiting.value, np.int8)
 
     def create_data_collector(self):
         """
         Creates the data collector used by this simulation to aggregate and
         visualize model data over time.
+
+        The data collector (and the pandas stack it depends on) is imported
+        here rather than at module level so that importing this model stays
+        lightweight for headless workers.
         """
+        from mesa.datacollection import DataCollector
+
         self.collector = DataCollector(
             model_reporters={
                 "knowing": lambda m: m.data["knowing"],
@@ -123,11 +187,26 @@ class TelephoneModel(Model):
     def create_networks(self):
         """
         Creates a social network for each person generated for this simulation.
+
+        By default each network is generated one person at a time by a
+        NetworkGenerator; if the "network" parameter names one of the
+        vectorized generators in network_gen.GENERATORS, then every network is
+        generated at once by it instead.
         """
-        generator = NetworkGenerator(self.num_people)
+        if self.network in (None, "uniform"):
+            generator = NetworkGenerator(self.num_people)
+
+            for person in self.people:
+                generator.generate_for(person, self)
+            return
+
+        rng = np.random.default_rng(np.random.randint(2 ** 32,
+                                                      dtype=np.uint64))
+        indptr, indices = generate_network(len(self.people), self.params, rng)
 
         for person in self.people:
-            generator.generate_for(person, self)
+            start, end = indptr[person.unique_id:person.unique_id + 2]
+            person.contacts = indices[start:end].tolist()
 
     def create_people(self):
         """
@@ -165,10 +244,44 @@ class TelephoneModel(Model):
 
         return person
 
+    def latencies(self):
+        """
+        Returns the median, 90th and 99th percentile search and report
+        latencies seen so far.
+
+        :return: A dictionary of quantile summaries keyed "search" and
+        "report".
+        """
+        return {"search": self.search_latency.summary(),
+                "report": self.report_latency.summary()}
+
+    def seed_randomizers(self, seed):
+        """
+        Seeds every random number generator used by this simulation so that
+        runs with the same seed and parameters are reproducible.
+
+        People and network generation draw from the global random and NumPy
+        generators while the scheduler draws from this model's own, so all
+        three are seeded.  A seed of None leaves the global generators
+        untouched, as Mesa does for its own.
+
+        :param seed: The seed to use, if any.
+        """
+        self.reset_randomizer(seed)
+        if seed is None:
+            return
+
+        seed_random(seed)
+        np.random.seed(seed % 2 ** 32)
+
     def step(self):
         """
         Updates the simulation for a single time step.
+
+        The data cache is recomputed once at the end of every step (and once
+        when the simulation is created), so it always describes the current
+        state of the population.
         """
-        self.compute_data()
         self.collector.collect(self)
         self.schedule.step()
+        self.compute_data()
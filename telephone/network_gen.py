@@ -4,6 +4,8 @@ directed social networks.
 """
 import random
 
+import numpy as np
+
 
 def can_link_to(person, contact, model):
     """
@@ -109,3 +111,164 @@ class NetworkGenerator:
             contact = model.people[contact_id]
             if can_link_to(person, contact, model):
                 link_to(person, contact, model)
+
+
+def configuration_model(num_people, params, rng):
+    """
+    Generates the links of a configuration-model network whose degrees follow
+    a heavy-tailed (discrete Pareto) distribution with exponent gamma and a
+    mean of roughly mu.
+
+    Each person's degree is split into "stubs" which are then paired
+    uniformly at random; self-links and repeated links are later discarded.
+
+    :param num_people: The number of people to link.
+    :param params: The model parameters to use.
+    :param rng: The NumPy random generator to use.
+    :return: A tuple of the source and target of every link.
+    """
+    gamma = params.get("gamma", 2.5)
+    if gamma <= 2.0:
+        raise ValueError("The degree exponent must be greater than two.")
+
+    smallest = max(1.0, params["mu"] * (gamma - 2.0) / (gamma - 1.0))
+    degrees = np.floor(smallest * rng.random(num_people) **
+                       (-1.0 / (gamma - 1.0))).astype(np.int64)
+    np.minimum(degrees, num_people - 1, out=degrees)
+
+    stubs = np.repeat(np.arange(num_people), degrees)
+    rng.shuffle(stubs)
+    stubs = stubs[:len(stubs) // 2 * 2]
+    return stubs[0::2], stubs[1::2]
+
+
+def load_edge_list(num_people, params, rng):
+    """
+    Loads the links of a network from the whitespace-separated edge list
+    named by the edge_list parameter, one "source target" pair per line;
+    lines beginning with "#" are ignored.
+
+    :param num_people: The number of people to link.
+    :param params: The model parameters to use.
+    :param rng: The NumPy random generator to use (unused).
+    :return: A tuple of the source and target of every link.
+    """
+    edges = np.loadtxt(params["edge_list"], np.int64, comments="#",
+                       ndmin=2)
+    if not len(edges):
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    if edges.shape[1] < 2 or edges[:, :2].min() < 0 or \
+            edges[:, :2].max() >= num_people:
+        raise ValueError("Edge list does not describe a network of {} "
+                         "people.".format(num_people))
+    return edges[:, 0], edges[:, 1]
+
+
+def preferential_attachment(num_people, params, rng):
+    """
+    Generates the links of a preferential-attachment (Barabasi-Albert)
+    network in which each new person links to about mu / 2 existing people,
+    chosen with probability proportional to their degree.
+
+    This uses Batagelj and Brandes' edge-array formulation: the target of
+    each new link copies a uniformly chosen earlier endpoint.  Because every
+    copy refers to an earlier position, all targets are resolved at once by
+    repeatedly following copies (pointer jumping) rather than one by one.
+
+    :param num_people: The number of people to link.
+    :param params: The model parameters to use.
+    :param rng: The NumPy random generator to use.
+    :return: A tuple of the source and target of every link.
+    """
+    per_person = max(1, int(round(params["mu"] / 2.0)))
+    links = num_people * per_person
+
+    # Position 2k holds the source of link k; position 2k + 1 copies the
+    # endpoint at a uniformly chosen position in [0, 2k].
+    copies = (rng.random(links) * (2 * np.arange(links) + 1)).astype(np.int64)
+    pointers = np.arange(2 * links)
+    pointers[1::2] = copies
+
+    odd = pointers % 2 == 1
+    while odd.any():
+        pointers[odd] = pointers[pointers[odd]]
+        odd = pointers % 2 == 1
+
+    sources = np.arange(links) // per_person
+    return sources, pointers[1::2] // 2 // per_person
+
+
+def small_world(num_people, params, rng):
+    """
+    Generates the links of a Watts-Strogatz small-world network: a ring in
+    which each person is linked to their mu nearest neighbours, after which
+    each link is rewired to a uniformly random person with probability
+    rewire_prob.
+
+    :param num_people: The number of people to link.
+    :param params: The model parameters to use.
+    :param rng: The NumPy random generator to use.
+    :return: A tuple of the source and target of every link.
+    """
+    half = max(1, int(params["mu"]) // 2)
+    sources = np.repeat(np.arange(num_people), half)
+    targets = (sources + np.tile(np.arange(1, half + 1), num_people)) % \
+        num_people
+
+    rewired = rng.random(len(targets)) < params.get("rewire_prob", 0.1)
+    targets[rewired] = rng.integers(0, num_people, np.count_nonzero(rewired))
+    return sources, targets
+
+
+GENERATORS = {
+    "configuration": configuration_model,
+    "edge-list": load_edge_list,
+    "preferential": preferential_attachment,
+    "small-world": small_world
+}
+"""
+The vectorized network generators selectable by the "network" model
+parameter, keyed by name.  The default, "uniform", is NetworkGenerator.
+"""
+
+
+def generate_network(num_people, params, rng):
+    """
+    Generates a social network for every person at once using the generator
+    named by the specified model parameters.
+
+    Each generator produces a set of links, each initiated by its source.
+    Exactly as link_to() does, every initiated link is reciprocated if
+    mutual contact is required and otherwise with the reciprocation
+    probability.  Self-links and repeated links are discarded.
+
+    :param num_people: The number of people to link.
+    :param params: The model parameters to use.
+    :param rng: The NumPy random generator to use.
+    :return: A tuple of the row pointers and column indices of the network
+    in compressed sparse row form.
+    """
+    if params["network"] not in GENERATORS:
+        raise ValueError("Unknown network generator: {}."
+                         .format(params["network"]))
+
+    sources, targets = GENERATORS[params["network"]](num_people, params, rng)
+    sources = np.asarray(sources, np.int64)
+    targets = np.asarray(targets, np.int64)
+
+    if params.get("require_mutual"):
+        reciprocated = np.ones(len(sources), np.bool_)
+    else:
+        reciprocated = rng.random(len(sources)) < params["recip_prob"]
+
+    links = np.concatenate((sources * num_people + targets,
+                            targets[reciprocated] * num_people +
+                            sources[reciprocated]))
+    links = links[links // num_people != links % num_people]
+    links.sort()
+    links = links[np.concatenate(([True], links[1:] != links[:-1]))]
+
+    indptr = np.zeros(num_people + 1, np.int64)
+    np.cumsum(np.bincount(links // num_people, minlength=num_people),
+              out=indptr[1:])
+    return indptr, links % num_people
@@ -0,0 +1,646 @@
+"""
+Contains all classes and functions necessary to run a single, very large
+simulation across several worker processes by partitioning its population
+into shards.
+
+Unlike the agent-based model, the population here is stored as flat arrays
+(see STATE_ARRAYS) and each person's social network as a compressed sparse
+row (CSR) adjacency structure, so that a simulation of tens of millions of
+people fits in memory and every array may be shared between processes.
+"""
+import multiprocessing
+import os
+from multiprocessing.shared_memory import SharedMemory
+from threading import BrokenBarrierError, Event, Thread
+
+import numpy as np
+
+from .network_gen import generate_network
+from .person import Person
+
+
+_REPORTING = Person.State.Reporting.value
+_SEARCHING = Person.State.Searching.value
+_WAITING = Person.State.Waiting.value
+
+_NO_PRIORITY = np.uint64(0)
+
+_POLL_INTERVAL = 0.1
+
+STATE_ARRAYS = {
+    "data": np.bool_,
+    "malicious": np.bool_,
+    "state": np.int8,
+    "requester": np.int64,
+    "last_dialed": np.int64,
+    "last_dialed_time": np.int64,
+    "target": np.int64,
+    "priority": np.uint64,
+    "best": np.uint64,
+    "matched": np.bool_,
+    "calling": np.bool_,
+    "partner": np.int64,
+    "partner_state": np.int8,
+    "outbox": np.int64
+}
+"""
+The per-person arrays, and their types, shared by every shard.  The first six
+mirror the attributes of Person; the remainder are scratch space used to
+match callers with callees during a single step.
+"""
+
+
+def contacts_to_csr(contacts):
+    """
+    Converts the specified list of per-person contact lists into compressed
+    sparse row form.
+
+    :param contacts: The contact identifiers of each person, in order.
+    :return: A tuple of the row pointers and column indices.
+    """
+    lengths = np.fromiter((len(c) for c in contacts), np.int64, len(contacts))
+    indptr = np.zeros(len(contacts) + 1, np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+
+    indices = np.fromiter((c for person in contacts for c in person),
+                          np.int64, int(indptr[-1]))
+    return indptr, indices
+
+
+def create_population(num_people, data_prob, malicious_prob, search_prob,
+                      rng):
+    """
+    Creates the initial state of a population of the specified size using the
+    same rules as the agent-based model (see model.is_malicious(),
+    model.is_knowledgeable() and model.initial_state()).
+
+    :param num_people: The number of people to create.
+    :param data_prob: The probability of initial knowledge.
+    :param malicious_prob: The probability of maliciousness.
+    :param search_prob: The probability of initial search desire.
+    :param rng: The NumPy random generator to use.
+    :return: A tuple of the data, malicious and state arrays.
+    """
+    malicious = rng.random(num_people) < malicious_prob
+    data = ~malicious & (rng.random(num_people) < data_prob)
+    waiting = data | (search_prob <= rng.random(num_people))
+    state = np.where(waiting, _WAITING, _SEARCHING).astype(np.int8)
+    return data, malicious, state
+
+
+def partition(indptr, shards):
+    """
+    Partitions the specified contact graph into contiguous ranges of people,
+    balancing each range by its number of people plus contacts.
+
+    :param indptr: The row pointers of the contact graph.
+    :param shards: The number of shards to create.
+    :return: The (shards + 1) boundaries of each shard's range.
+    """
+    num_people = len(indptr) - 1
+    work = indptr + np.arange(num_people + 1)
+    targets = np.linspace(0, work[-1], shards + 1)
+
+    bounds = np.searchsorted(work, targets).astype(np.int64)
+    bounds[0], bounds[-1] = 0, num_people
+    return np.maximum.accumulate(bounds)
+
+
+def _hash(seed, step, round_, purpose, people):
+    """
+    Returns a counter-based pseudo-random 64-bit value for each of the
+    specified people (SplitMix64), so that random choices do not depend on
+    how the population is partitioned.
+    """
+    with np.errstate(over="ignore"):
+        x = np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15) + \
+            np.uint64(step) * np.uint64(0xBF58476D1CE4E5B9) + \
+            np.uint64(round_ * 4 + purpose) * np.uint64(0x94D049BB133111EB)
+        x = people.astype(np.uint64) ^ x
+        for shift, multiplier in ((30, 0xBF58476D1CE4E5B9),
+                                  (27, 0x94D049BB133111EB)):
+            x = (x ^ (x >> np.uint64(shift))) * np.uint64(multiplier)
+        return x ^ (x >> np.uint64(31))
+
+
+class _Shard:
+    """
+    Represents the range of people owned by a single worker.
+
+    A shard only ever writes to the entries of the people it owns, but may
+    read any person's state.  A step is split into phases separated by a
+    barrier: proposals are made (propose), the best proposal touching each
+    person is found (resolve), winning calls are matched (match), and finally
+    each side of a matched call updates its own state (apply).
+    """
+
+    def __init__(self, index, bounds, arrays, indptr, indices, seed,
+                 last_dialed_threshold):
+        self.arrays = arrays
+        self.bounds = bounds
+        self.index = index
+        self.indices = indices
+        self.indptr = indptr
+        self.last_dialed_threshold = last_dialed_threshold
+        self.lo = int(bounds[index])
+        self.hi = int(bounds[index + 1])
+        self.seed = seed
+
+        self._inbox = None
+
+    def __getattr__(self, item):
+        if item in STATE_ARRAYS:
+            return self.arrays[item]
+        raise AttributeError(item)
+
+    def apply(self, step):
+        """
+        Applies the outcome of every call this shard's people took part in,
+        mirroring Person.call(), Person.respond_to(), Person.report_back()
+        and Person.receive_update_from().
+
+        :param step: The current time step.
+        """
+        owned = np.arange(self.lo, self.hi)
+        matched = owned[self.matched[self.lo:self.hi]]
+
+        callers = matched[self.calling[matched]]
+        partners = self.partner[callers]
+        searchers = self.state[callers] == _SEARCHING
+
+        caller, callee = callers[searchers], partners[searchers]
+        found = self.data[callee] & ~self.malicious[callee]
+        self.data[caller] = found
+        self.last_dialed[caller] = callee
+        self.last_dialed_time[caller] = step
+        caller = caller[found]
+        self.state[caller] = np.where(self.requester[caller] == -1,
+                                      _WAITING, _REPORTING)
+        self._finish(callers[~searchers])
+
+        callees = matched[~self.calling[matched]]
+        kinds = self.partner_state[callees]
+
+        asked = callees[kinds == _SEARCHING]
+        asked = asked[~self.data[asked] & (self.requester[asked] == -1) &
+                      (self.state[asked] != _SEARCHING)]
+        self.state[asked] = _SEARCHING
+        self.requester[asked] = self.partner[asked]
+
+        told = callees[kinds == _REPORTING]
+        self.data[told] = True
+        self.state[told] = np.where(self.requester[told] == -1, _WAITING,
+                                    _REPORTING)
+        self.matched[self.lo:self.hi] = False
+
+    def count(self):
+        """
+        Returns the number of this shard's people that know the data and that
+        are reporting, searching and waiting, respectively.
+
+        :return: An array of counts.
+        """
+        state = self.state[self.lo:self.hi]
+        return np.array([np.count_nonzero(self.data[self.lo:self.hi]),
+                         np.count_nonzero(state == _REPORTING),
+                         np.count_nonzero(state == _SEARCHING),
+                         np.count_nonzero(state == _WAITING)], np.int64)
+
+    def match(self):
+        """
+        Marks every proposal involving this shard's people that has the
+        highest priority of all proposals touching both its caller and its
+        callee; such calls never conflict, so the one-call-per-step rule holds.
+
+        :return: The number of calls placed by this shard's people.
+        """
+        callers = np.arange(self.lo, self.hi)
+        callers = callers[self.target[self.lo:self.hi] != -1]
+        callers = callers[self._wins(callers)]
+
+        self.matched[callers] = True
+        self.calling[callers] = True
+        self.partner[callers] = self.target[callers]
+
+        inbox = self._inbox[self._wins(self._inbox)]
+        callees = self.target[inbox]
+        self.matched[callees] = True
+        self.calling[callees] = False
+        self.partner[callees] = inbox
+        self.partner_state[callees] = self.state[inbox]
+
+        return len(callers)
+
+    def propose(self, step, round_, outbox, offsets):
+        """
+        Chooses who each of this shard's active, unmatched people would like
+        to call and posts every proposal to the outbox of the shard that owns
+        the callee.
+
+        :param step: The current time step.
+        :param round_: The current matching round within this step.
+        :param outbox: This shard's slice of the shared outbox array.
+        :param offsets: This shard's row of the shared outbox offsets.
+        """
+        lo, hi = self.lo, self.hi
+        if round_ == 0:
+            self._begin(step)
+
+        self.target[lo:hi] = -1
+        self.priority[lo:hi] = _NO_PRIORITY
+
+        owned = np.arange(lo, hi)
+        idle = owned[~self.matched[lo:hi]]
+
+        reporters = idle[self.state[idle] == _REPORTING]
+        reporters = reporters[~self.matched[self.requester[reporters]]]
+        self.target[reporters] = self.requester[reporters]
+        self._choose(idle[self.state[idle] == _SEARCHING], step, round_)
+
+        callers = owned[self.target[lo:hi] != -1]
+        self.priority[callers] = \
+            (_hash(self.seed, step, round_, 0, callers) >> np.uint64(32)
+             << np.uint64(32)) | callers.astype(np.uint64) | \
+            np.uint64(1 << 63)
+
+        shard = np.searchsorted(self.bounds, self.target[callers],
+                                "right") - 1
+        order = np.argsort(shard, kind="stable")
+        outbox[:len(callers)] = callers[order]
+        offsets[:] = np.searchsorted(shard[order],
+                                     np.arange(len(self.bounds)))
+
+    def resolve(self, outboxes, offsets):
+        """
+        Collects the proposals posted to this shard and records the highest
+        priority of all proposals touching each of this shard's people.
+
+        :param outboxes: Each shard's outbox.
+        :param offsets: Each shard's outbox offsets.
+        """
+        lo, hi = self.lo, self.hi
+        self._inbox = np.concatenate(
+            [outbox[row[self.index]:row[self.index + 1]]
+             for outbox, row in zip(outboxes, offsets)])
+
+        best = self.priority[lo:hi].copy()
+        np.maximum.at(best, self.target[self._inbox] - lo,
+                      self.priority[self._inbox])
+        self.best[lo:hi] = best
+
+    def _begin(self, step):
+        lo, hi = self.lo, self.hi
+        owned = np.arange(lo, hi)
+        reporters = owned[self.state[lo:hi] == _REPORTING]
+        self._finish(reporters[(self.requester[reporters] == -1) |
+                               self.malicious[reporters]])
+
+        if self.last_dialed_threshold != -1:
+            expired = owned[(self.last_dialed[lo:hi] != -1) &
+                            (step - self.last_dialed_time[lo:hi] >
+                             self.last_dialed_threshold)]
+            self.last_dialed[expired] = -1
+
+    def _choose(self, searchers, step, round_):
+        starts = self.indptr[searchers]
+        lengths = self.indptr[searchers + 1] - starts
+        segment = np.repeat(np.arange(len(searchers)), lengths)
+        first = np.cumsum(lengths) - lengths
+        contacts = self.indices[np.arange(len(segment)) -
+                                np.repeat(first - starts, lengths)]
+
+        eligible = (contacts != np.repeat(self.last_dialed[searchers],
+                                          lengths)) & \
+                   (contacts != np.repeat(self.requester[searchers],
+                                          lengths)) & \
+                   ~self.matched[contacts]
+        counts = np.bincount(segment, eligible, len(searchers)).astype(np.int64)
+
+        choice = np.zeros(len(searchers), np.int64)
+        able = counts > 0
+        choice[able] = (_hash(self.seed, step, round_, 1, searchers[able]) %
+                        counts[able].astype(np.uint64)).astype(np.int64)
+
+        before = np.cumsum(eligible) - eligible
+        start = np.concatenate(([0], np.cumsum(eligible)))[first]
+        rank = before - np.repeat(start, lengths)
+        chosen = eligible & (rank == choice[segment])
+        self.target[searchers[segment[chosen]]] = contacts[chosen]
+
+    def _finish(self, people):
+        self.requester[people] = -1
+        self.state[people] = _WAITING
+
+    def _wins(self, callers):
+        priority = self.priority[callers]
+        return (priority == self.best[callers]) & \
+               (priority == self.best[self.target[callers]])
+
+
+def _attach(names, num_people):
+    memory = {name: SharedMemory(shared) for name, shared in names.items()}
+    arrays = {name: np.ndarray(num_people, STATE_ARRAYS[name],
+                               memory[name].buf)
+              for name in STATE_ARRAYS}
+    return memory, arrays
+
+
+def _monitor(workers, barriers, stopping):
+    """
+    Aborts the specified barriers as soon as any worker process exits before
+    it has been told to stop (e.g. because it was killed by a signal or the
+    out-of-memory killer and so could not abort them itself), so that no
+    other process waits on them forever.
+    """
+    while not stopping.wait(_POLL_INTERVAL):
+        if any(worker.exitcode is not None for worker in workers):
+            for barrier in barriers:
+                barrier.abort()
+            return
+
+
+def _work(index, names, num_people, graph_names, graph_sizes, bounds,
+          control, offsets, counts, wins, go, sync, seed,
+          last_dialed_threshold, max_rounds):
+    """
+    The entry point of a single shard's worker process.
+    """
+    memory, arrays = _attach(names, num_people)
+    graph = [SharedMemory(name) for name in graph_names]
+    indptr = np.ndarray(graph_sizes[0], np.int64, graph[0].buf)
+    indices = np.ndarray(graph_sizes[1], np.int64, graph[1].buf)
+    offsets = np.ndarray((len(bounds) - 1, len(bounds)), np.int64,
+                         offsets.get_obj())
+    counts = np.ndarray((len(bounds) - 1, 4), np.int64, counts.get_obj())
+    wins = np.ndarray(len(bounds) - 1, np.int64, wins.get_obj())
+
+    shard = _Shard(index, bounds, arrays, indptr, indices, seed,
+                   last_dialed_threshold)
+    outboxes = [arrays["outbox"][lo:hi] for lo, hi in zip(bounds, bounds[1:])]
+
+    try:
+        while True:
+            go.wait()
+            if not control[0]:
+                break
+
+            step = control[1]
+            for round_ in range(max_rounds):
+                shard.propose(step, round_, outboxes[index], offsets[index])
+                sync.wait()
+                shard.resolve(outboxes, offsets)
+                sync.wait()
+                wins[index] = shard.match()
+                sync.wait()
+                if not wins.any():
+                    break
+
+            shard.apply(step)
+            counts[index] = shard.count()
+            go.wait()
+    except BrokenBarrierError:
+        pass
+    except BaseException:
+        go.abort()
+        sync.abort()
+        raise
+    finally:
+        del shard, outboxes, arrays, indptr, indices
+        for shared in list(memory.values()) + graph:
+            shared.close()
+
+
+class PartitionedSimulation:
+    """
+    Represents a single simulation whose population is partitioned into
+    shards, each owned by a worker process, with all state held in shared
+    memory.
+
+    Every step is synchronous: each active person proposes a call (searchers
+    to a random eligible contact, reporters to their requester), proposals
+    are exchanged between shards in batched outboxes, and a proposal only
+    succeeds if it has the highest (pseudo-random) priority of all proposals
+    involving either its caller or its callee.  Unmatched people propose
+    again for up to max_rounds rounds per step.  Because every random choice
+    is derived from the seed, step and person, results are identical for any
+    number of shards.
+
+    Please note that this synchronous matching resolves contention
+    differently than the agent-based model's random activation order, so the
+    two agree in distribution rather than run-for-run.
+
+    Attributes:
+        bounds (numpy.array): The boundaries of each shard's range of people.
+        indptr (numpy.array): The row pointers of the contact graph.
+        indices (numpy.array): The column indices of the contact graph.
+        last_dialed_threshold (int): The delay before calling someone again.
+        max_rounds (int): The most matching rounds per step.
+        num_people (int): The size of the population.
+        seed (int): The seed of every random choice.
+        shards (int): The number of shards (and so worker processes).
+        steps (int): The number of steps run so far.
+    """
+
+    def __init__(self, indptr, indices, data, malicious, state, seed,
+                 last_dialed_threshold=-1, shards=None, max_rounds=4):
+        self.indptr = np.ascontiguousarray(indptr, np.int64)
+        self.indices = np.ascontiguousarray(indices, np.int64)
+        self.last_dialed_threshold = last_dialed_threshold
+        self.max_rounds = max_rounds
+        self.num_people = len(self.indptr) - 1
+        self.seed = seed
+        self.shards = shards or os.cpu_count()
+        self.steps = 0
+
+        self.bounds = partition(self.indptr, self.shards)
+        self._initial = {"data": data, "malicious": malicious,
+                         "state": state}
+
+    @classmethod
+    def from_params(cls, params, seed, **kwargs):
+        """
+        Creates a new partitioned simulation directly from the specified model
+        parameters, generating its population and social networks without
+        creating any agents.
+
+        The social networks are generated by the vectorized generator named
+        by the "network" parameter (see network_gen.GENERATORS).  If no seed
+        is given, a random one is drawn and kept as this simulation's seed,
+        so that the run can still be reproduced.
+
+        :param params: The model parameters to use.
+        :param seed: The seed to use, if any.
+        :param kwargs: Any additional arguments for the simulation.
+        :return: A new partitioned simulation.
+        """
+        if seed is None:
+            seed = int(np.random.default_rng().integers(2 ** 63))
+
+        rng = np.random.default_rng(seed)
+        num_people = params["num_people"]
+
+        population = create_population(num_people, params["data_prob"],
+                                       params["malicious_prob"],
+                                       params["search_prob"], rng)
+        indptr, indices = generate_network(num_people, params, rng)
+
+        kwargs.setdefault("last_dialed_threshold",
+                          params["last_dialed_threshold"])
+        return cls(indptr, indices, *population, seed, **kwargs)
+
+    @classmethod
+    def from_model(cls, model, **kwargs):
+        """
+        Creates a new partitioned simulation from the population and social
+        networks of the specified (agent-based) model.
+
+        :param model: The model to copy.
+        :param kwargs: Any additional arguments for the simulation.
+        :return: A new partitioned simulation.
+        """
+        indptr, indices = contacts_to_csr([p.contacts for p in model.people])
+        data = np.array([p.data for p in model.people], np.bool_)
+        malicious = np.array([p.malicious for p in model.people], np.bool_)
+        state = np.array([p.state.value for p in model.people], np.int8)
+
+        kwargs.setdefault("last_dialed_threshold",
+                          model.last_dialed_threshold)
+        return cls(indptr, indices, data, malicious, state,
+                   model.random.getrandbits(63), **kwargs)
+
+    def run(self, max_steps):
+        """
+        Runs this simulation until it is either quiescent or the maximum
+        number of steps has passed.
+
+        The result has the same layout as runner.record_replication(): one
+        row per step plus a final row, and one column per entry in
+        runner.SERIES_COLUMNS.
+
+        :param max_steps: The maximum number of steps to run for.
+        :return: The per-step series of population counts.
+        """
+        self.steps = 0
+        if self.shards == 1:
+            return self._run_serial(max_steps)
+        return self._run_parallel(max_steps)
+
+    def _create_arrays(self, allocate):
+        arrays = {name: allocate(name, dtype)
+                  for name, dtype in STATE_ARRAYS.items()}
+
+        for name in STATE_ARRAYS:
+            arrays[name][:] = -1 if np.dtype(STATE_ARRAYS[name]).kind == "i" \
+                else 0
+        for name, values in self._initial.items():
+            arrays[name][:] = values
+        arrays["last_dialed_time"][:] = -1
+        return arrays
+
+    def _row(self, counts):
+        knowing, reporting, searching, waiting = counts.sum(axis=0)
+        return [knowing, self.num_people - knowing, reporting, searching,
+                waiting]
+
+    def _run_parallel(self, max_steps):
+        context = multiprocessing.get_context()
+        memory = {}
+
+        def allocate(name, dtype):
+            size = max(1, self.num_people * np.dtype(dtype).itemsize)
+            memory[name] = SharedMemory(create=True, size=size)
+            return np.ndarray(self.num_people, dtype, memory[name].buf)
+
+        graph = [SharedMemory(create=True, size=max(1, array.nbytes))
+                 for array in (self.indptr, self.indices)]
+        for shared, array in zip(graph, (self.indptr, self.indices)):
+            np.ndarray(array.shape, np.int64, shared.buf)[:] = array
+
+        shards = self.shards
+        control = context.Array("q", 2, lock=False)
+        offsets = context.Array("q", shards * (shards + 1))
+        counts = context.Array("q", shards * 4)
+        wins = context.Array("q", shards)
+        go = context.Barrier(shards + 1)
+        sync = context.Barrier(shards)
+
+        arrays = whole = shard_counts = None
+        stopping = Event()
+        monitor = None
+        workers = []
+        try:
+            arrays = self._create_arrays(allocate)
+            names = {name: memory[name].name for name in STATE_ARRAYS}
+            for index in range(shards):
+                worker = context.Process(
+                    target=_work,
+                    args=(index, names, self.num_people,
+                          [shared.name for shared in graph],
+                          (len(self.indptr), len(self.indices)), self.bounds,
+                          control, offsets, counts, wins, go, sync, self.seed,
+                          self.last_dialed_threshold, self.max_rounds),
+                    daemon=True)
+                worker.start()
+                workers.append(worker)
+
+            monitor = Thread(target=_monitor, args=(workers, (go, sync),
+                                                    stopping), daemon=True)
+            monitor.start()
+
+            shard_counts = np.ndarray((shards, 4), np.int64,
+                                      counts.get_obj())
+            whole = _Shard(0, np.array([0, self.num_people]), arrays,
+                           self.indptr, self.indices, self.seed,
+                           self.last_dialed_threshold)
+            series = [self._row(whole.count()[np.newaxis])]
+
+            while series[-1][2] + series[-1][3] > 0 and \
+                    self.steps < max_steps:
+                control[0], control[1] = 1, self.steps
+                go.wait()
+                go.wait()
+                series.append(self._row(shard_counts))
+                self.steps += 1
+
+            stopping.set()
+            monitor.join()
+            control[0] = 0
+            go.wait()
+            for worker in workers:
+                worker.join()
+            return np.array(series, np.int32)
+        except BrokenBarrierError:
+            raise RuntimeError("A shard's worker process failed.")
+        finally:
+            stopping.set()
+            if monitor is not None:
+                monitor.join()
+            arrays = whole = shard_counts = None
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+            for shared in list(memory.values()) + graph:
+                shared.close()
+                shared.unlink()
+
+    def _run_serial(self, max_steps):
+        arrays = self._create_arrays(lambda name, dtype:
+                                     np.empty(self.num_people, dtype))
+        shard = _Shard(0, self.bounds, arrays, self.indptr, self.indices,
+                       self.seed, self.last_dialed_threshold)
+        outboxes = [arrays["outbox"]]
+        offsets = np.zeros((1, 2), np.int64)
+        series = [self._row(shard.count()[np.newaxis])]
+
+        while series[-1][2] + series[-1][3] > 0 and self.steps < max_steps:
+            for round_ in range(self.max_rounds):
+                shard.propose(self.steps, round_, outboxes[0], offsets[0])
+                shard.resolve(outboxes, offsets)
+                if not shard.match():
+                    break
+
+            shard.apply(self.steps)
+            series.append(self._row(shard.count()[np.newaxis]))
+            self.steps += 1
+
+        return np.array(series, np.int32)
@@ -0,0 +1,337 @@
+"""
+Contains all classes and functions necessary to run many headless
+replications of this project's simulation across a sweep of parameter sets,
+adaptively deciding how many replications each parameter set requires.
+"""
+import math
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from statistics import NormalDist
+
+import numpy as np
+
+from .model import TelephoneModel
+
+
+TARGETS = ("knowing", "quiesced", "quiescence")
+"""
+The outcomes measured for every replication: the final fraction of the
+population that knows the data, whether or not the replication came to rest
+before its maximum number of steps passed, and the number of steps it ran for
+(only a time to quiescence if it did come to rest).
+"""
+
+SERIES_COLUMNS = ("knowing", "not-knowing", "reporting", "searching",
+                  "waiting")
+"""
+The columns, in order, of the per-step series recorded for a replication.
+"""
+
+
+def is_quiescent(model):
+    """
+    Returns whether or not the specified model has come to rest, i.e. that
+    no person is searching for or reporting the data.
+
+    The model's data cache is recomputed at the end of every step, so this
+    reflects the model's current state.
+
+    :param model: The model to check.
+    :return: Whether or not the model is quiescent.
+    """
+    return model.data["searching"] == 0 and model.data["reporting"] == 0
+
+
+def measure(model):
+    """
+    Returns the target outcomes of the specified (finished) model.
+
+    :param model: The model to measure.
+    :return: A dictionary of measured outcomes, keyed by target.
+    """
+    return {"knowing": model.data["knowing"] / len(model.people),
+            "quiesced": is_quiescent(model),
+            "quiescence": model.steps}
+
+
+def record_replication(params, seed, max_steps):
+    """
+    Runs a single replication of a simulation exactly as run_replication()
+    does, but also returns the per-step series of population counts.
+
+    The series has one row per step plus a final row for the state the
+    simulation finished in, and one column per entry in SERIES_COLUMNS.
+
+    :param params: The model parameters to use.
+    :param seed: The seed to use.
+    :param max_steps: The maximum number of steps to run for.
+    :return: A tuple of the measured outcomes and the per-step series.
+    """
+    model = simulate(params, seed, max_steps)
+    return measure(model), series_of(model)
+
+
+def run_replication(params, seed, max_steps):
+    """
+    Runs a single replication of a simulation with the specified parameters
+    and seed until it is either quiescent or the maximum number of steps has
+    passed.
+
+    :param params: The model parameters to use.
+    :param seed: The seed to use.
+    :param max_steps: The maximum number of steps to run for.
+    :return: A dictionary of measured outcomes, keyed by target.
+    """
+    return measure(simulate(params, seed, max_steps))
+
+
+def series_of(model):
+    """
+    Returns the per-step series of population counts of the specified
+    (finished) model, including a final row for the state it finished in.
+
+    :param model: The model to use.
+    :return: The per-step series, one column per entry in SERIES_COLUMNS.
+    """
+    model.collector.collect(model)
+    return np.array([model.collector.model_vars[column]
+                     for column in SERIES_COLUMNS], dtype=np.int32).T
+
+
+def simulate(params, seed, max_steps):
+    """
+    Creates and runs a simulation with the specified parameters and seed
+    until it is either quiescent or the maximum number of steps has passed.
+
+    :param params: The model parameters to use.
+    :param seed: The seed to use.
+    :param max_steps: The maximum number of steps to run for.
+    :return: The finished model.
+    """
+    model = TelephoneModel(seed, **params)
+
+    while not is_quiescent(model) and model.steps < max_steps:
+        model.step()
+
+    return model
+
+
+class RunningStats:
+    """
+    Represents the streaming mean and variance of a single outcome, computed
+    incrementally using Welford's algorithm.
+
+    Attributes:
+        count (int): The number of observations seen.
+        mean (float): The mean of all observations seen.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        """
+        Adds the specified observation to these statistics.
+
+        :param value: The observation to add.
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def half_width(self, confidence):
+        """
+        Returns the half-width of the normal-approximation confidence
+        interval about the mean at the specified confidence level.
+
+        :param confidence: The confidence level to use, in (0, 1).
+        :return: The half-width of the confidence interval, or infinity if
+        there are too few observations to estimate it.
+        """
+        if self.count < 2:
+            return math.inf
+        z = NormalDist().inv_cdf((1.0 + confidence) / 2.0)
+        return z * math.sqrt(self.variance() / self.count)
+
+    def variance(self):
+        """
+        Returns the (unbiased) sample variance of all observations seen.
+
+        :return: The sample variance.
+        """
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+
+class AdaptiveRunner:
+    """
+    Represents a mechanism for running replications of many parameter sets
+    until the confidence interval of every target outcome is narrower than a
+    requested width.
+
+    Replications are scheduled in batches per parameter set.  Whenever a
+    parameter set's batch completes its statistics are checked and, if they
+    have not yet converged, another batch is queued; converged parameter sets
+    stop receiving work, so the workers they would have occupied move on to
+    the parameter sets that still need samples.
+
+    A replication that is stopped at the maximum number of steps without
+    coming to rest has no time to quiescence, so it only counts towards the
+    "knowing" and "quiesced" statistics; the "quiescence" statistics of a
+    parameter set therefore cover only the replications that came to rest.
+
+    Replication i of every parameter set uses the seed (seed + i), so
+    parameter sets are compared using common random numbers and any sweep is
+    reproducible.  If a result store is given, replications it already holds
+    are read from it rather than run, and new replications are saved to it.
+
+    Attributes:
+        batch_size (int): The number of replications scheduled at once.
+        confidence (float): The confidence level of each interval.
+        max_replications (int): The most replications a parameter set may use.
+        max_steps (int): The most steps a single replication may run for.
+        max_workers (int): The number of worker processes; one runs serially.
+        min_replications (int): The fewest replications a parameter set uses.
+        param_sets (list): The model parameters to sweep over.
+        seed (int): The seed of each parameter set's first replication.
+        stats (list): The statistics of each parameter set, keyed by target.
+        store (ResultStore): The store of completed replications, if any.
+        widths (dict): The target interval width, keyed by target.
+    """
+
+    def __init__(self, param_sets, widths, confidence=0.95, batch_size=8,
+                 min_replications=10, max_replications=1000, max_steps=1000,
+                 max_workers=None, seed=0, store=None):
+        if batch_size < 1:
+            raise ValueError("Batch size must be positive.")
+        if min_replications < 2:
+            raise ValueError("At least two replications are required.")
+        if not set(widths) <= set(TARGETS):
+            raise ValueError("Unknown target(s): {}."
+                             .format(", ".join(set(widths) - set(TARGETS))))
+
+        self.batch_size = batch_size
+        self.confidence = confidence
+        self.max_replications = max_replications
+        self.max_steps = max_steps
+        self.max_workers = max_workers
+        self.min_replications = min_replications
+        self.param_sets = list(param_sets)
+        self.seed = seed
+        self.stats = [{target: RunningStats() for target in TARGETS}
+                      for _ in self.param_sets]
+        self.store = store
+        self.widths = dict(widths)
+
+        self._scheduled = [0] * len(self.param_sets)
+
+    def is_converged(self, index):
+        """
+        Returns whether or not the parameter set at the specified index
+        requires no further replications.
+
+        :param index: The index of the parameter set to check.
+        :return: Whether or not the parameter set has converged.
+        """
+        stats = self.stats[index]
+        count = stats[TARGETS[0]].count
+
+        if count >= self.max_replications:
+            return True
+        if count < self.min_replications:
+            return False
+        return all(2.0 * stats[target].half_width(self.confidence) <= width
+                   for target, width in self.widths.items())
+
+    def next_batch(self, index):
+        """
+        Returns the (parameters, seed, maximum steps) arguments for the next
+        batch of replications of the parameter set at the specified index.
+
+        :param index: The index of the parameter set to schedule.
+        :return: A list of replication arguments.
+        """
+        start = self._scheduled[index]
+        stop = min(start + self.batch_size, self.max_replications)
+        self._scheduled[index] = stop
+
+        return [(self.param_sets[index], self.seed + i, self.max_steps)
+                for i in range(start, stop)]
+
+    def record(self, index, outcome):
+        """
+        Records the outcome of a single replication of the parameter set at
+        the specified index.
+
+        :param index: The index of the parameter set.
+        :param outcome: The replication outcome, keyed by target.
+        """
+        for target, value in outcome.items():
+            if target != "quiescence" or outcome["quiesced"]:
+                self.stats[index][target].add(value)
+
+    def run(self):
+        """
+        Runs replications of every parameter set until each has converged.
+
+        :return: The statistics of each parameter set, keyed by target.
+        """
+        if self.max_workers == 1:
+            self._run_serial()
+        else:
+            self._run_parallel()
+        return self.stats
+
+    def _run_parallel(self):
+        pending = {}
+        outstanding = [0] * len(self.param_sets)
+        task = run_replication if self.store is None else record_replication
+
+        with ProcessPoolExecutor(self.max_workers) as executor:
+            def schedule(index):
+                while outstanding[index] == 0 and \
+                        not self.is_converged(index):
+                    for args in self.next_batch(index):
+                        outcome = self._fetch(*args)
+                        if outcome is not None:
+                            self.record(index, outcome)
+                        else:
+                            future = executor.submit(task, *args)
+                            pending[future] = (index, args)
+                            outstanding[index] += 1
+
+            for index in range(len(self.param_sets)):
+                schedule(index)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, args = pending.pop(future)
+                    outstanding[index] -= 1
+
+                    if self.store is None:
+                        self.record(index, future.result())
+                    else:
+                        outcome, series = future.result()
+                        self.store.put(*args, outcome, series)
+                        self.record(index, outcome)
+
+                    schedule(index)
+
+    def _run_serial(self):
+        for index in range(len(self.param_sets)):
+            while not self.is_converged(index):
+                for args in self.next_batch(index):
+                    outcome = run_replication(*args) if self.store is None \
+                        else self.store.run(*args)
+                    self.record(index, outcome)
+
+    def _fetch(self, params, seed, max_steps):
+        if self.store is None:
+            return None
+
+        result = self.store.get(params, seed, max_steps)
+        if result is None:
+            return None
+        return {target: result[target] for target in TARGETS}
@@ -1,11 +1,12 @@
 """
 Contains all the classes and functions necessary to visualize the results of
 this project's agent-based simulation.
+
+The Mesa visualization stack (and Tornado beneath it) is only imported once a
+server is actually requested through create_server(), so that headless and
+model-only users of this package do not pay for it at import time.
 """
 import time
-from mesa.visualization.ModularVisualization import ModularServer
-from mesa.visualization.UserParam import UserSettableParameter
-from mesa.visualization.modules import CanvasGrid, ChartModule
 
 from .model import TelephoneModel
 from .person import Person
@@ -30,38 +31,54 @@ def person_portrayal(person):
                 _STATE_COLORS[person.state]}
 
 
-_PARAMS = {
-    "seed": int(time.time()),
-    "num_people": UserSettableParameter("slider", "Number of People", 225, 2,
-                                        225, 1),
-    "data_prob": UserSettableParameter("slider", "Probability of Initial "
-                                                 "Knowledge",
-                                       0.05, 0.0, 1.0, 0.01),
-    "malicious_prob": UserSettableParameter("slider", "Probability of "
-                                                      "Maliciousness",
-                                            0.05, 0.0, 1.0, 0.01),
-    "search_prob": UserSettableParameter("slider", "Probability of Initial "
-                                                   "Search Desire",
-                                         0.05, 0.0, 1.0, 0.01),
-    "last_dialed_threshold": UserSettableParameter("slider",
-                                                   "Delay Before Calling the "
-                                                   "Same Person Twice",
-                                                   -1, -1, 5, 1),
-    "mu": UserSettableParameter("slider", "Average Number of People in a "
-                                          "Social Network (μ)",
-                                10, 0, 20, 1),
-    "sigma": UserSettableParameter("slider", "Standard Deviation of Social "
-                                             "Network (σ)",
-                                   0, 0, 10, 0.1),
-    "recip_prob": UserSettableParameter("slider", "Probability of "
-                                                  "Reciprocation",
-                                        1.0, 0.0, 1.0, 0.01),
-    "require_mutual": UserSettableParameter("checkbox", "Mutal Contact "
-                                                        "is Required",
-                                            False),
-    "width": 15,
-    "height": 15
-}
+def create_params():
+    """
+    Returns the user-selectable model parameters displayed by the
+    visualization server.
+
+    :return: A new dictionary of model parameters.
+    """
+    from mesa.visualization.UserParam import UserSettableParameter
+
+    return {
+        "seed": int(time.time()),
+        "num_people": UserSettableParameter("slider", "Number of People", 225,
+                                            2, 225, 1),
+        "data_prob": UserSettableParameter("slider", "Probability of Initial "
+                                                     "Knowledge",
+                                           0.05, 0.0, 1.0, 0.01),
+        "malicious_prob": UserSettableParameter("slider", "Probability of "
+                                                          "Maliciousness",
+                                                0.05, 0.0, 1.0, 0.01),
+        "search_prob": UserSettableParameter("slider", "Probability of "
+                                                       "Initial Search Desire",
+                                             0.05, 0.0, 1.0, 0.01),
+        "last_dialed_threshold": UserSettableParameter("slider",
+                                                       "Delay Before Calling "
+                                                       "the Same Person Twice",
+                                                       -1, -1, 5, 1),
+        "mu": UserSettableParameter("slider", "Average Number of People in a "
+                                              "Social Network (μ)",
+                                    10, 0, 20, 1),
+        "sigma": UserSettableParameter("slider", "Standard Deviation of "
+                                                 "Social Network (σ)",
+                                       0, 0, 10, 0.1),
+        "recip_prob": UserSettableParameter("slider", "Probability of "
+                                                      "Reciprocation",
+                                            1.0, 0.0, 1.0, 0.01),
+        "require_mutual": UserSettableParameter("checkbox", "Mutal Contact "
+                                                            "is Required",
+                                                False),
+        "network": UserSettableParameter("choice", "Social Network "
+                                                   "Topology",
+                                         value="uniform",
+                                         choices=["uniform", "configuration",
+                                                  "preferential",
+                                                  "small-world"]),
+        "width": 15,
+        "height": 15
+    }
+
 
 _KNOWING = {"Label": "knowing", "Color": "blue"}
 _NOT_KNOWING = {"Label": "not-knowing", "Color": "red"}
@@ -70,10 +87,42 @@ _REPORTING = {"Label": "reporting", "Color": "green"}
 _SEARCHING = {"Label": "searching", "Color": "red"}
 _WAITING = {"Label": "waiting", "Color": "gray"}
 
-knowledge_chart = ChartModule([_KNOWING, _NOT_KNOWING],
-                       data_collector_name="collector")
-state_chart = ChartModule([_REPORTING, _SEARCHING, _WAITING],
-                          data_collector_name="collector")
-grid = CanvasGrid(person_portrayal, 15, 15, 500, 500)
-server = ModularServer(TelephoneModel, [grid, knowledge_chart, state_chart],
-                       "Telephone Model", _PARAMS)
+
+def create_server():
+    """
+    Creates a new visualization server for this project's simulation,
+    importing the Mesa visualization stack on demand.
+
+    :return: A new server.
+    """
+    from mesa.visualization.ModularVisualization import ModularServer
+    from mesa.visualization.modules import CanvasGrid, ChartModule
+
+    knowledge_chart = ChartModule([_KNOWING, _NOT_KNOWING],
+                                  data_collector_name="collector")
+    state_chart = ChartModule([_REPORTING, _SEARCHING, _WAITING],
+                              data_collector_name="collector")
+    grid = CanvasGrid(person_portrayal, 15, 15, 500, 500)
+    return ModularServer(TelephoneModel, [grid, knowledge_chart, state_chart],
+                         "Telephone Model", create_params())
+
+
+_server = None
+
+
+def __getattr__(name):
+    """
+    Lazily creates the shared visualization server the first time it is
+    requested as this module's "server" attribute.
+
+    :param name: The name of the attribute to find.
+    :return: The shared visualization server.
+    """
+    global _server
+
+    if name == "server":
+        if _server is None:
+            _server = create_server()
+        return _server
+    raise AttributeError("module {} has no attribute {}".format(__name__,
+                                                                 name))
@@ -0,0 +1,70 @@
+"""
+Contains all classes and functions necessary to summarize streams of
+observations without storing them.
+"""
+import math
+
+import numpy as np
+
+
+class LatencySketch:
+    """
+    Represents a streaming summary of latencies, measured in whole time
+    steps, from which any quantile may be queried at any time.
+
+    Because latencies are small non-negative integers bounded by the number
+    of steps simulated, this sketch is simply a histogram of counts indexed
+    by latency; it is therefore exact, its memory is proportional to the
+    largest latency seen rather than to the number of observations, and
+    adding a batch of observations costs a single vectorized update.
+
+    Attributes:
+        count (int): The number of observations seen.
+    """
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self._counts = np.zeros(capacity, np.int64)
+
+    def add(self, latencies):
+        """
+        Adds the specified latencies to this sketch.
+
+        :param latencies: An array of non-negative integer latencies.
+        """
+        latencies = np.asarray(latencies, np.int64)
+        if not len(latencies):
+            return
+        if latencies.min() < 0:
+            raise ValueError("Latencies must be non-negative.")
+
+        largest = int(latencies.max())
+        if largest >= len(self._counts):
+            capacity = max(largest + 1, 2 * len(self._counts))
+            self._counts = np.concatenate(
+                (self._counts, np.zeros(capacity - len(self._counts),
+                                        np.int64)))
+
+        self._counts += np.bincount(latencies, minlength=len(self._counts))
+        self.count += len(latencies)
+
+    def quantile(self, q):
+        """
+        Returns the (nearest-rank) quantile of all latencies seen.
+
+        :param q: The quantile to find, in [0, 1].
+        :return: The quantile, or None if no latencies have been seen.
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        return int(np.searchsorted(np.cumsum(self._counts), rank))
+
+    def summary(self):
+        """
+        Returns the median, 90th and 99th percentiles of all latencies seen.
+
+        :return: A dictionary of quantiles keyed "p50", "p90" and "p99".
+        """
+        return {"p50": self.quantile(0.5), "p90": self.quantile(0.9),
+                "p99": self.quantile(0.99)}
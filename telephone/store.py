@@ -0,0 +1,306 @@
+"""
+Contains all classes and functions necessary to memoize the results of
+completed simulation runs on disk, so that repeated and overlapping parameter
+sweeps only compute the runs that are missing.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import zlib
+
+import numpy as np
+
+from .runner import SERIES_COLUMNS, TARGETS, record_replication
+
+
+_MODEL_MODULES = ("model.py", "network_gen.py", "person.py", "runner.py")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    key TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    max_steps INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    knowing REAL NOT NULL,
+    quiescence INTEGER NOT NULL,
+    series BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed INTEGER NOT NULL
+);
+DROP INDEX IF EXISTS runs_accessed;
+CREATE INDEX IF NOT EXISTS runs_recency ON runs (accessed, size);
+CREATE INDEX IF NOT EXISTS runs_version ON runs (version, params, seed);
+"""
+
+
+def canonical_params(params):
+    """
+    Returns the canonical (key-sorted, compact) JSON encoding of the
+    specified model parameters.
+
+    :param params: The model parameters to encode.
+    :return: The canonical encoding.
+    """
+    return json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+
+def model_version():
+    """
+    Returns a digest of the source code that determines the outcome of a
+    simulation run, so that stored results are invalidated whenever that code
+    changes.
+
+    :return: The model code version.
+    """
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    for name in _MODEL_MODULES:
+        with open(os.path.join(directory, name), "rb") as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+def file_digest(path):
+    """
+    Returns a digest of the contents of the specified file.
+
+    :param path: The path to the file to digest.
+    :return: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def run_key(params, seed, max_steps, version):
+    """
+    Returns the unique key of a simulation run.
+
+    A run whose social networks are loaded from an edge list depends on that
+    file's contents rather than its name, so a digest of the file is folded
+    into the key as well.
+
+    :param params: The model parameters of the run.
+    :param seed: The seed of the run.
+    :param max_steps: The maximum number of steps of the run.
+    :param version: The model code version of the run.
+    :return: The hexadecimal key of the run.
+    """
+    if params.get("network") == "edge-list":
+        params = dict(params, edge_list_digest=file_digest(
+            params["edge_list"]))
+
+    run = {"params": params, "seed": seed, "max_steps": max_steps,
+           "version": version}
+    return hashlib.sha256(canonical_params(run).encode()).hexdigest()
+
+
+class ResultStore:
+    """
+    Represents a local, size-bounded cache of completed simulation runs.
+
+    Each run is keyed by a hash of its parameters, seed, maximum number of
+    steps and the current model code version; seeded runs are deterministic,
+    so a stored run is identical to re-running it.  Runs are kept in a single
+    SQLite database with the final outcomes stored as indexed columns and the
+    per-step series (see runner.SERIES_COLUMNS) as a compressed array, from
+    whose final row whether or not the run quiesced is read back.
+
+    When the total size of all stored runs exceeds the maximum, the least
+    recently used runs are evicted first.  Reading a run only records its
+    access time in memory; the access times are written to the database
+    with the next change to it, or when the store is closed.
+
+    Attributes:
+        max_bytes (int): The maximum total size of all stored runs, if any.
+        path (str): The path to the database file.
+        version (str): The model code version of runs added by this store.
+    """
+
+    def __init__(self, path, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.version = model_version()
+
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+        self._clock = self._connection.execute(
+            "SELECT COALESCE(MAX(accessed), 0) FROM runs").fetchone()[0]
+        self._touched = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def close(self):
+        """
+        Closes the connection to this store's database.
+        """
+        self._flush()
+        self._connection.commit()
+        self._connection.close()
+
+    def evict(self, max_bytes):
+        """
+        Evicts the least recently used runs until the total size of this
+        store is at most the specified number of bytes.
+
+        :param max_bytes: The maximum total size to keep.
+        :return: The number of runs evicted.
+        """
+        self._flush()
+        if self.size() <= max_bytes:
+            self._connection.commit()
+            return 0
+
+        # Keep the most recently used runs whose sizes sum to at most the
+        # maximum, i.e. exactly those left by evicting the oldest first.
+        evicted = self._connection.execute(
+            "DELETE FROM runs WHERE rowid IN (SELECT rowid FROM (SELECT "
+            "rowid, SUM(size) OVER (ORDER BY accessed DESC) AS kept FROM "
+            "runs) WHERE kept > ?)", (max_bytes,)).rowcount
+        self._connection.commit()
+        return evicted
+
+    def get(self, params, seed, max_steps):
+        """
+        Returns the stored result of the specified run, if any.
+
+        :param params: The model parameters of the run.
+        :param seed: The seed of the run.
+        :param max_steps: The maximum number of steps of the run.
+        :return: The stored result, or None if the run has not been stored.
+        """
+        key = self._key(params, seed, max_steps)
+        row = self._connection.execute("SELECT * FROM runs WHERE key = ?",
+                                       (key,)).fetchone()
+
+        if row is None:
+            return None
+
+        self._touch(key)
+        return self._to_result(row)
+
+    def put(self, params, seed, max_steps, outcome, series):
+        """
+        Stores the result of the specified run, evicting older runs if
+        necessary.  Unseeded runs are not reproducible and so cannot be
+        stored.
+
+        :param params: The model parameters of the run.
+        :param seed: The seed of the run.
+        :param max_steps: The maximum number of steps of the run.
+        :param outcome: The measured outcomes of the run, keyed by target.
+        :param series: The per-step series of the run.
+        """
+        if seed is None:
+            raise ValueError("Unseeded runs cannot be stored.")
+
+        encoded = canonical_params(params)
+        blob = zlib.compress(np.ascontiguousarray(series, np.int32).tobytes())
+        key = self._key(params, seed, max_steps)
+
+        self._flush()
+        self._clock += 1
+        self._connection.execute(
+            "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, encoded, seed, max_steps, self.version, outcome["knowing"],
+             outcome["quiescence"], blob, len(blob) + len(encoded),
+             self._clock))
+        self._connection.commit()
+
+        if self.max_bytes is not None:
+            self.evict(self.max_bytes)
+
+    def query(self, max_steps=None, **criteria):
+        """
+        Returns every stored run of the current model code version whose
+        parameters match all of the specified criteria.
+
+        The criteria are evaluated by SQLite against the stored parameters,
+        so only matching runs are read and decompressed.
+
+        :param max_steps: The maximum number of steps to match, if any.
+        :param criteria: The model parameter values to match.
+        :return: A list of stored results, ordered by parameters and seed.
+        """
+        sql = "SELECT * FROM runs WHERE version = ?"
+        args = [self.version]
+
+        if max_steps is not None:
+            sql += " AND max_steps = ?"
+            args.append(max_steps)
+        for name, value in sorted(criteria.items()):
+            sql += " AND json_extract(params, ?) IS ?"
+            args.extend(('$."{}"'.format(name), value))
+
+        return [self._to_result(row) for row in self._connection.execute(
+            sql + " ORDER BY params, seed", args)]
+
+    def run(self, params, seed, max_steps):
+        """
+        Returns the outcomes of the specified run, computing and storing it
+        only if it has not already been stored.  Unseeded runs are not
+        reproducible and so cannot be stored.
+
+        :param params: The model parameters of the run.
+        :param seed: The seed of the run.
+        :param max_steps: The maximum number of steps of the run.
+        :return: The measured outcomes of the run, keyed by target.
+        """
+        if seed is None:
+            raise ValueError("Unseeded runs cannot be stored.")
+
+        result = self.get(params, seed, max_steps)
+
+        if result is None:
+            outcome, series = record_replication(params, seed, max_steps)
+            self.put(params, seed, max_steps, outcome, series)
+            return outcome
+        return {target: result[target] for target in TARGETS}
+
+    def size(self):
+        """
+        Returns the total size, in bytes, of all stored runs.
+
+        :return: The total size of this store.
+        """
+        return self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM runs").fetchone()[0]
+
+    def _flush(self):
+        self._connection.executemany(
+            "UPDATE runs SET accessed = ? WHERE key = ?",
+            [(accessed, key) for key, accessed in self._touched.items()])
+        self._touched.clear()
+
+    def _key(self, params, seed, max_steps):
+        return run_key(params, seed, max_steps, self.version)
+
+    def _to_result(self, row):
+        _, params, seed, max_steps, _, knowing, quiescence, blob, _, _ = row
+        series = np.frombuffer(zlib.decompress(blob), np.int32).reshape(
+            -1, len(SERIES_COLUMNS))
+        active = series[-1, [SERIES_COLUMNS.index("reporting"),
+                             SERIES_COLUMNS.index("searching")]]
+
+        return {"params": json.loads(params), "seed": seed,
+                "max_steps": max_steps, "knowing": knowing,
+                "quiesced": not active.any(), "quiescence": quiescence,
+                "series": series}
+
+    def _touch(self, key):
+        self._clock += 1
+        self._touched[key] = self._clock
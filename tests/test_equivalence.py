@@ -0,0 +1,133 @@
+"""
+Contains unit tests for verifying the statistical equivalence harness and,
+through it, the equivalence of the alternative engines to the reference
+model.
+"""
+from unittest import TestCase, mock
+
+import numpy as np
+
+from telephone.equivalence import DEGREE_SAMPLES, candidate_seed, \
+    compare, ks_test, metrics, partitioned_engine, reciprocity, \
+    reference_engine
+from telephone.partition import _Shard
+from telephone.store import canonical_params
+
+
+_PARAMS = {"num_people": 64, "data_prob": 0.05, "malicious_prob": 0.3,
+           "search_prob": 0.2, "last_dialed_threshold": 1, "mu": 4,
+           "sigma": 1, "recip_prob": 0.5, "require_mutual": False,
+           "width": 8, "height": 8}
+
+_SEEDS = range(20)
+
+_APPLY = _Shard.apply
+
+
+def memoized(engine):
+    """
+    Returns the specified engine, memoizing the sample of every run.
+
+    :param engine: The engine to memoize.
+    :return: The memoized engine.
+    """
+    samples = {}
+
+    def run(params, seed, max_steps):
+        key = (canonical_params(params), seed, max_steps)
+        if key not in samples:
+            samples[key] = engine(params, seed, max_steps)
+        return samples[key]
+    return run
+
+
+def truthful_apply(shard, step):
+    """
+    Applies a step of the specified shard as if none of its people were
+    malicious, so that malicious callees answer truthfully.
+
+    :param shard: The shard to update.
+    :param step: The step to apply.
+    """
+    malicious = shard.malicious.copy()
+    shard.malicious[:] = False
+    _APPLY(shard, step)
+    shard.malicious[:] = malicious
+
+
+class EquivalenceTest(TestCase):
+    """
+    Test suite for the statistical equivalence harness.
+    """
+
+    def test_ks_accepts_identical_samples(self):
+        values = np.random.default_rng(0).integers(0, 5, 100)
+        self.assertEqual((0.0, 1.0), ks_test(values, values))
+
+    def test_ks_accepts_samples_from_same_distribution(self):
+        rng = np.random.default_rng(0)
+        _, p_value = ks_test(rng.integers(0, 5, 100), rng.integers(0, 5, 100))
+        self.assertGreater(p_value, 0.01)
+
+    def test_ks_rejects_shifted_samples(self):
+        rng = np.random.default_rng(0)
+        statistic, p_value = ks_test(rng.integers(0, 5, 100),
+                                     rng.integers(1, 6, 100))
+        self.assertGreater(statistic, 0.1)
+        self.assertLess(p_value, 1e-3)
+
+    def test_ks_p_value_is_exact(self):
+        # Only 2 of the 20 ways of splitting six values into two samples of
+        # three separate them completely, and 8 of the 20 ways of splitting
+        # two ones and four twos put both ones or neither in the first.
+        statistic, p_value = ks_test([1, 2, 3], [4, 5, 6])
+        self.assertEqual(1.0, statistic)
+        self.assertAlmostEqual(0.1, p_value)
+        self.assertAlmostEqual(0.4, ks_test([1, 1, 2], [2, 2, 2])[1])
+
+        _, p_value = ks_test([0] * 20, [1] * 20)
+        self.assertLess(p_value, 1e-10)
+
+    def test_candidate_seeds_are_independent(self):
+        seeds = [candidate_seed(seed) for seed in _SEEDS]
+        self.assertEqual(len(seeds), len(set(seeds) - set(_SEEDS)))
+
+    def test_degree_observations_are_bounded(self):
+        def sample(num_people):
+            return {"indptr": np.arange(0, 3 * num_people + 1, 3),
+                    "indices": np.zeros(3 * num_people, np.int64)}
+
+        self.assertEqual([3] * DEGREE_SAMPLES,
+                         metrics(sample(1000))["degree"])
+        self.assertEqual([3] * 10, metrics(sample(10))["degree"])
+
+    def test_reciprocity(self):
+        sample = {"indptr": np.array([0, 2, 3, 3]),
+                  "indices": np.array([1, 2, 0])}
+        self.assertAlmostEqual(2 / 3, reciprocity(sample))
+
+    def test_partitioned_engine_is_equivalent(self):
+        report = compare(partitioned_engine, [_PARAMS], _SEEDS)
+        self.assertTrue(report.passed(), "\n" + str(report))
+
+    def test_detects_truthful_malicious_callees(self):
+        with mock.patch.object(_Shard, "apply", truthful_apply):
+            report = compare(partitioned_engine, [_PARAMS], _SEEDS)
+        self.assertFalse(report.passed())
+
+    def test_detects_truthful_malicious_callees_in_large_family(self):
+        with mock.patch.object(_Shard, "apply", truthful_apply):
+            report = compare(memoized(partitioned_engine), [_PARAMS] * 8,
+                             _SEEDS, reference=memoized(reference_engine))
+        self.assertEqual(128, len(report.results))
+        self.assertFalse(report.passed())
+
+    def test_detects_non_equivalent_network(self):
+        def candidate(params, seed, max_steps):
+            return reference_engine(dict(params, recip_prob=1.0), seed,
+                                    max_steps)
+
+        report = compare(candidate, [_PARAMS], _SEEDS)
+        self.assertFalse(report.passed())
+        self.assertIn("reciprocity", [name for _, name, _, _ in
+                                      report.failures()])
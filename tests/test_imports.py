@@ -0,0 +1,40 @@
+"""
+Contains unit tests for verifying that importing this project stays
+lightweight for headless and model-only use.
+"""
+import subprocess
+import sys
+from unittest import TestCase
+
+
+_HEAVY_MODULES = ("mesa.visualization", "pandas", "tornado")
+
+
+def loaded_heavy_modules(module):
+    """
+    Imports the specified module in a fresh interpreter and returns the names
+    of all heavyweight modules that were loaded as a result.
+
+    :param module: The name of the module to import.
+    :return: A list of loaded heavyweight module names.
+    """
+    code = "import sys, {0}; print(' '.join(m for m in sys.modules " \
+           "if (m + '.').startswith({1!r})))"\
+        .format(module, tuple(x + "." for x in _HEAVY_MODULES))
+    output = subprocess.check_output([sys.executable, "-c", code])
+    return output.decode().split()
+
+
+class ImportTest(TestCase):
+    """
+    Test suite for the import-time budget of this project's modules.
+    """
+
+    def test_model_import_does_not_load_heavy_modules(self):
+        self.assertEqual([], loaded_heavy_modules("telephone.model"))
+
+    def test_server_import_does_not_load_visualization(self):
+        self.assertEqual([], loaded_heavy_modules("telephone.server"))
+
+    def test_main_import_does_not_load_visualization(self):
+        self.assertEqual([], loaded_heavy_modules("telephone.main"))
@@ -0,0 +1,66 @@
+"""
+Contains unit tests for verifying the correctness of the simulation model.
+"""
+from unittest import TestCase, mock
+
+import numpy as np
+
+from telephone.model import TelephoneModel
+from telephone.runner import simulate
+
+
+_PARAMS = {"num_people": 100, "data_prob": 0.05, "malicious_prob": 0.05,
+           "search_prob": 0.2, "last_dialed_threshold": -1, "mu": 5,
+           "sigma": 1, "recip_prob": 0.5, "require_mutual": False,
+           "width": 10, "height": 10}
+
+
+class TelephoneModelTest(TestCase):
+    """
+    Test suite for TelephoneModel.
+    """
+
+    def setUp(self):
+        self.model = simulate(_PARAMS, 11, 500)
+
+    def test_initial_searches_start_at_zero(self):
+        model = TelephoneModel(11, **_PARAMS)
+
+        searching = np.array([p.is_searching() for p in model.people])
+        self.assertTrue(np.any(searching))
+        self.assertTrue(np.all(model.search_start[searching] == 0))
+        self.assertTrue(np.all(model.search_start[~searching] == -1))
+
+    def test_every_resolved_search_is_counted(self):
+        resolved = self.model.search_end != -1
+
+        self.assertEqual(np.count_nonzero(resolved),
+                         self.model.search_latency.count)
+        self.assertTrue(np.all(self.model.search_end[resolved] >
+                               self.model.search_start[resolved]))
+
+    def test_dropped_reports_are_not_counted(self):
+        delivered = self.model.report_end != -1
+
+        self.assertEqual(np.count_nonzero(delivered),
+                         self.model.report_latency.count)
+        self.assertFalse(np.any(delivered & self.model.malicious))
+
+    def test_latencies_are_bounded_by_steps(self):
+        latencies = self.model.latencies()
+
+        self.assertLessEqual(latencies["search"]["p99"], self.model.steps)
+        self.assertLessEqual(latencies["search"]["p50"],
+                             latencies["search"]["p90"])
+
+    def test_data_is_computed_once_per_step(self):
+        compute_data = TelephoneModel.compute_data
+        with mock.patch.object(TelephoneModel, "compute_data", autospec=True,
+                               side_effect=compute_data) as compute:
+            model = simulate(_PARAMS, 11, 500)
+
+        self.assertEqual(model.steps + 1, compute.call_count)
+
+    def test_unseeded_model_is_created(self):
+        model = TelephoneModel(None, **_PARAMS)
+        self.assertEqual(_PARAMS["num_people"], len(model.people))
@@ -0,0 +1,124 @@
+"""
+Contains unit tests for verifying the correctness of social network
+generation.
+"""
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from telephone.equivalence import reciprocity
+from telephone.model import TelephoneModel
+from telephone.network_gen import GENERATORS, generate_network
+from telephone.partition import PartitionedSimulation
+
+
+_PARAMS = {"num_people": 100, "data_prob": 0.05, "malicious_prob": 0.05,
+           "search_prob": 0.2, "last_dialed_threshold": -1, "mu": 6,
+           "sigma": 1, "recip_prob": 0.5, "require_mutual": False,
+           "width": 10, "height": 10}
+
+_TOPOLOGIES = ("configuration", "preferential", "small-world")
+
+
+def generate(num_people, **params):
+    """
+    Generates a network of the specified size using the test parameters,
+    overridden by the specified parameters.
+
+    :param num_people: The number of people to link.
+    :param params: The parameters to override.
+    :return: A new sample of the generated network.
+    """
+    indptr, indices = generate_network(num_people, dict(_PARAMS, **params),
+                                       np.random.default_rng(0))
+    return {"indptr": indptr, "indices": indices}
+
+
+class GenerateNetworkTest(TestCase):
+    """
+    Test suite for the vectorized network generators.
+    """
+
+    def test_networks_are_simple(self):
+        for name in _TOPOLOGIES:
+            sample = generate(1000, network=name)
+            indptr, indices = sample["indptr"], sample["indices"]
+            sources = np.repeat(np.arange(1000), np.diff(indptr))
+
+            self.assertEqual(len(indices), indptr[-1], name)
+            self.assertFalse(np.any(sources == indices), name)
+            self.assertEqual(len(indices),
+                             len(np.unique(sources * 1000 + indices)), name)
+
+    def test_mutual_networks_are_fully_reciprocated(self):
+        for name in _TOPOLOGIES:
+            sample = generate(1000, network=name, require_mutual=True,
+                              recip_prob=0.0)
+            self.assertEqual(1.0, reciprocity(sample), name)
+
+    def test_reciprocation_probability_is_respected(self):
+        for name in _TOPOLOGIES:
+            none = generate(10000, network=name, recip_prob=0.0)
+            half = generate(10000, network=name, recip_prob=0.5)
+
+            self.assertLess(reciprocity(none), 0.1, name)
+            self.assertAlmostEqual(2 / 3, reciprocity(half), delta=0.1,
+                                   msg=name)
+
+    def test_heavy_tailed_topologies(self):
+        for name in ("configuration", "preferential"):
+            degrees = np.diff(generate(10000, network=name)["indptr"])
+            self.assertGreater(degrees.max(), 10 * degrees.mean(), name)
+
+    def test_small_world_degrees_are_narrow(self):
+        degrees = np.diff(generate(10000, network="small-world",
+                                   require_mutual=True)["indptr"])
+        self.assertAlmostEqual(6, degrees.mean(), delta=0.1)
+        self.assertLess(degrees.max(), 15)
+
+    def test_unknown_generator_is_rejected(self):
+        self.assertRaises(ValueError, generate, 10, network="unknown")
+        self.assertNotIn("unknown", GENERATORS)
+
+    def test_edge_list_is_loaded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "edges.txt")
+            with open(path, "w") as edges:
+                edges.write("# source target\n0 1\n1 2\n2 0\n0 1\n")
+
+            sample = generate(3, network="edge-list", edge_list=path,
+                              require_mutual=False, recip_prob=0.0)
+            self.assertEqual([0, 1, 2, 3], sample["indptr"].tolist())
+            self.assertEqual([1, 2, 0], sample["indices"].tolist())
+
+            self.assertRaises(ValueError, generate, 2, network="edge-list",
+                              edge_list=path)
+
+    def test_model_uses_selected_generator(self):
+        params = dict(_PARAMS, network="small-world", require_mutual=True)
+        model = TelephoneModel(3, **params)
+
+        for person in model.people:
+            self.assertGreater(len(person.contacts), 0)
+            for contact in person.contacts:
+                self.assertIn(person.unique_id,
+                              model.people[contact].contacts)
+
+    def test_partitioned_simulation_from_params(self):
+        params = dict(_PARAMS, num_people=5000, network="preferential")
+        simulation = PartitionedSimulation.from_params(params, 1, shards=1)
+        series = simulation.run(50)
+
+        self.assertEqual(5000, simulation.num_people)
+        self.assertTrue(np.all(series[:, 0] + series[:, 1] == 5000))
+
+    def test_unseeded_partitioned_simulation_is_reproducible(self):
+        params = dict(_PARAMS, network="preferential")
+        simulation = PartitionedSimulation.from_params(params, None, shards=1)
+        series = simulation.run(20)
+
+        again = PartitionedSimulation.from_params(params, simulation.seed,
+                                                  shards=1)
+        self.assertTrue(np.array_equal(series, again.run(20)))
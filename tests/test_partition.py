@@ -0,0 +1,124 @@
+"""
+Contains unit tests for verifying the correctness of partitioned simulations.
+"""
+import os
+import signal
+from unittest import TestCase, mock
+
+import numpy as np
+
+from telephone.model import TelephoneModel
+from telephone.partition import PartitionedSimulation, STATE_ARRAYS, \
+    _Shard, _work, contacts_to_csr, partition
+from telephone.person import Person
+
+
+_PARAMS = {"num_people": 100, "data_prob": 0.05, "malicious_prob": 0.05,
+           "search_prob": 0.2, "last_dialed_threshold": 2, "mu": 5,
+           "sigma": 1, "recip_prob": 0.5, "require_mutual": False,
+           "width": 10, "height": 10}
+
+_SEARCHING = Person.State.Searching.value
+_WAITING = Person.State.Waiting.value
+
+
+def create_star(num_people):
+    """
+    Creates a single-shard star network in which every person but the first
+    is searching and knows only the first.
+
+    :param num_people: The number of people to create.
+    :return: A new shard and its state arrays.
+    """
+    indptr, indices = contacts_to_csr([[]] + [[0]] * (num_people - 1))
+    arrays = {name: np.full(num_people, -1 if np.dtype(dtype).kind == "i"
+                            else 0, dtype)
+              for name, dtype in STATE_ARRAYS.items()}
+    arrays["state"][:] = _SEARCHING
+    arrays["state"][0] = _WAITING
+
+    shard = _Shard(0, np.array([0, num_people]), arrays, indptr, indices,
+                   1, -1)
+    return shard, arrays
+
+
+def work_or_die(index, *args):
+    """
+    Runs a shard's worker, except for the second shard's, which is killed
+    outright without any chance to clean up.
+    """
+    if index == 1:
+        os.kill(os.getpid(), signal.SIGKILL)
+    _work(index, *args)
+
+
+class PartitionTest(TestCase):
+    """
+    Test suite for PartitionedSimulation and its helpers.
+    """
+
+    def test_contacts_to_csr(self):
+        indptr, indices = contacts_to_csr([[1, 2], [], [0]])
+        self.assertEqual([0, 2, 2, 3], indptr.tolist())
+        self.assertEqual([1, 2, 0], indices.tolist())
+
+    def test_partition_covers_population(self):
+        indptr, _ = contacts_to_csr([[0] * 9] + [[0]] * 9)
+        bounds = partition(indptr, 3)
+
+        self.assertEqual(0, bounds[0])
+        self.assertEqual(10, bounds[-1])
+        self.assertTrue(np.all(np.diff(bounds) >= 0))
+        self.assertEqual(1, bounds[1])
+
+    def test_contended_callee_receives_a_single_call(self):
+        shard, arrays = create_star(10)
+        offsets = np.zeros((1, 2), np.int64)
+
+        for round_ in range(3):
+            shard.propose(0, round_, arrays["outbox"], offsets[0])
+            shard.resolve([arrays["outbox"]], offsets)
+            shard.match()
+
+        self.assertEqual(2, np.count_nonzero(arrays["matched"]))
+        caller = arrays["partner"][0]
+        self.assertEqual(0, arrays["partner"][caller])
+        self.assertTrue(arrays["calling"][caller])
+
+        shard.apply(0)
+        self.assertEqual(_SEARCHING, arrays["state"][0])
+        self.assertEqual(caller, arrays["requester"][0])
+        self.assertEqual(0, arrays["last_dialed"][caller])
+
+    def test_run_reaches_quiescence(self):
+        model = TelephoneModel(5, **_PARAMS)
+        series = PartitionedSimulation.from_model(model, shards=1).run(500)
+
+        self.assertEqual(5, series.shape[1])
+        self.assertTrue(np.all(series[:, 0] + series[:, 1] == 100))
+        self.assertEqual(0, series[-1, 2] + series[-1, 3])
+
+    def test_results_are_independent_of_shard_count(self):
+        serial = PartitionedSimulation.from_model(
+            TelephoneModel(5, **_PARAMS), shards=1)
+        parallel = PartitionedSimulation.from_model(
+            TelephoneModel(5, **_PARAMS), shards=3)
+
+        expected = serial.run(100)
+        self.assertTrue(np.array_equal(expected, parallel.run(100)))
+        self.assertEqual(serial.steps, parallel.steps)
+
+    def test_run_restarts_from_initial_state(self):
+        simulation = PartitionedSimulation.from_model(
+            TelephoneModel(5, **_PARAMS), shards=1)
+
+        expected = simulation.run(10)
+        self.assertTrue(np.array_equal(expected, simulation.run(10)))
+        self.assertEqual(len(expected) - 1, simulation.steps)
+
+    def test_killed_worker_fails_run(self):
+        simulation = PartitionedSimulation.from_model(
+            TelephoneModel(5, **_PARAMS), shards=2)
+
+        with mock.patch("telephone.partition._work", work_or_die):
+            self.assertRaises(RuntimeError, simulation.run, 100)
@@ -0,0 +1,111 @@
+"""
+Contains unit tests for verifying the correctness of adaptive replication.
+"""
+import math
+import statistics
+from unittest import TestCase
+
+from telephone.runner import AdaptiveRunner, RunningStats, run_replication
+
+
+_PARAMS = {"num_people": 25, "data_prob": 0.1, "malicious_prob": 0.05,
+           "search_prob": 0.2, "last_dialed_threshold": -1, "mu": 4,
+           "sigma": 1, "recip_prob": 0.5, "require_mutual": False,
+           "width": 5, "height": 5}
+
+
+class RunningStatsTest(TestCase):
+    """
+    Test suite for RunningStats.
+    """
+
+    def test_mean_and_variance_match_batch_computation(self):
+        values = [3.0, 1.5, 4.0, 1.0, 5.5, 9.0, 2.5]
+        stats = RunningStats()
+        for value in values:
+            stats.add(value)
+
+        self.assertEqual(len(values), stats.count)
+        self.assertAlmostEqual(statistics.mean(values), stats.mean)
+        self.assertAlmostEqual(statistics.variance(values), stats.variance())
+
+    def test_half_width_is_infinite_with_too_few_observations(self):
+        stats = RunningStats()
+        stats.add(1.0)
+        self.assertEqual(math.inf, stats.half_width(0.95))
+
+    def test_half_width_shrinks_with_more_observations(self):
+        stats = RunningStats()
+        for value in [0.0, 1.0] * 5:
+            stats.add(value)
+        before = stats.half_width(0.95)
+
+        for value in [0.0, 1.0] * 50:
+            stats.add(value)
+        self.assertLess(stats.half_width(0.95), before)
+
+
+class AdaptiveRunnerTest(TestCase):
+    """
+    Test suite for AdaptiveRunner.
+    """
+
+    def test_replication_is_reproducible(self):
+        self.assertEqual(run_replication(_PARAMS, 7, 100),
+                         run_replication(_PARAMS, 7, 100))
+
+    def test_rejects_unknown_target(self):
+        self.assertRaises(ValueError, AdaptiveRunner, [_PARAMS],
+                          {"unknown": 1.0})
+
+    def test_low_variance_set_stops_at_minimum(self):
+        params = dict(_PARAMS, search_prob=0.0)
+        runner = AdaptiveRunner([params], {"knowing": 0.1, "quiescence": 1.0},
+                                batch_size=4, min_replications=4,
+                                max_workers=1)
+
+        stats = runner.run()
+        self.assertEqual(4, stats[0]["quiescence"].count)
+        self.assertEqual(0, stats[0]["quiescence"].mean)
+
+    def test_stuck_replications_are_left_out_of_quiescence(self):
+        params = dict(_PARAMS, data_prob=0.0, search_prob=0.5)
+        self.assertFalse(run_replication(params, 1, 20)["quiesced"])
+
+        runner = AdaptiveRunner([params, _PARAMS], {"quiescence": 1.0},
+                                batch_size=4, min_replications=4,
+                                max_replications=8, max_steps=20,
+                                max_workers=1)
+        stats = runner.run()
+
+        self.assertEqual(8, stats[0]["knowing"].count)
+        self.assertEqual(0, stats[0]["quiesced"].mean)
+        self.assertEqual(0, stats[0]["quiescence"].count)
+        quiesced = stats[1]["quiesced"]
+        self.assertAlmostEqual(quiesced.count * quiesced.mean,
+                               stats[1]["quiescence"].count)
+
+    def test_unreachable_width_stops_at_maximum(self):
+        runner = AdaptiveRunner([_PARAMS], {"knowing": 0.0}, batch_size=4,
+                                min_replications=4, max_replications=10,
+                                max_steps=50, max_workers=1)
+
+        stats = runner.run()
+        self.assertEqual(10, stats[0]["knowing"].count)
+
+    def test_parallel_matches_serial(self):
+        param_sets = [_PARAMS, dict(_PARAMS, search_prob=0.5)]
+        kwargs = {"batch_size": 3, "min_replications": 3,
+                  "max_replications": 9, "max_steps": 50}
+
+        serial = AdaptiveRunner(param_sets, {"knowing": 0.05},
+                                max_workers=1, **kwargs).run()
+        parallel = AdaptiveRunner(param_sets, {"knowing": 0.05},
+                                  max_workers=2, **kwargs).run()
+
+        for expected, actual in zip(serial, parallel):
+            for target in expected:
+                self.assertEqual(expected[target].count,
+                                 actual[target].count)
+                self.assertAlmostEqual(expected[target].mean,
+                                       actual[target].mean)
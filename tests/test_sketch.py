@@ -0,0 +1,39 @@
+"""
+Contains unit tests for verifying the correctness of streaming summaries.
+"""
+from unittest import TestCase
+
+import numpy as np
+
+from telephone.sketch import LatencySketch
+
+
+class LatencySketchTest(TestCase):
+    """
+    Test suite for LatencySketch.
+    """
+
+    def setUp(self):
+        self.sketch = LatencySketch(capacity=4)
+
+    def test_quantile_is_none_when_empty(self):
+        self.assertIsNone(self.sketch.quantile(0.5))
+
+    def test_quantiles_match_nearest_rank(self):
+        values = np.random.default_rng(0).integers(0, 200, 1000)
+        for batch in np.array_split(values, 7):
+            self.sketch.add(batch)
+
+        ordered = np.sort(values)
+        self.assertEqual(1000, self.sketch.count)
+        for q in (0.0, 0.5, 0.9, 0.99, 1.0):
+            rank = max(1, int(np.ceil(q * len(values))))
+            self.assertEqual(ordered[rank - 1], self.sketch.quantile(q))
+
+    def test_summary(self):
+        self.sketch.add(range(1, 101))
+        self.assertEqual({"p50": 50, "p90": 90, "p99": 99},
+                         self.sketch.summary())
+
+    def test_rejects_negative_latencies(self):
+        self.assertRaises(ValueError, self.sketch.add, [1, -1])
@@ -0,0 +1,175 @@
+"""
+Contains unit tests for verifying the correctness of memoized simulation
+results.
+"""
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from unittest import TestCase, mock
+
+import numpy as np
+
+from telephone.runner import AdaptiveRunner, record_replication
+from telephone.store import ResultStore, run_key
+
+
+_PARAMS = {"num_people": 25, "data_prob": 0.1, "malicious_prob": 0.05,
+           "search_prob": 0.2, "last_dialed_threshold": -1, "mu": 4,
+           "sigma": 1, "recip_prob": 0.5, "require_mutual": False,
+           "width": 5, "height": 5}
+
+
+class ResultStoreTest(TestCase):
+    """
+    Test suite for ResultStore.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.db")
+        self.store = ResultStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_key_is_independent_of_parameter_order(self):
+        reordered = dict(reversed(list(_PARAMS.items())))
+        self.assertEqual(run_key(_PARAMS, 1, 10, "v"),
+                         run_key(reordered, 1, 10, "v"))
+        self.assertNotEqual(run_key(_PARAMS, 1, 10, "v"),
+                            run_key(_PARAMS, 1, 10, "w"))
+
+    def test_get_returns_none_when_missing(self):
+        self.assertIsNone(self.store.get(_PARAMS, 1, 50))
+
+    def test_put_round_trips_outcome_and_series(self):
+        outcome, series = record_replication(_PARAMS, 1, 50)
+        self.store.put(_PARAMS, 1, 50, outcome, series)
+
+        result = self.store.get(_PARAMS, 1, 50)
+        self.assertEqual(outcome["knowing"], result["knowing"])
+        self.assertTrue(result["quiesced"])
+        self.assertEqual(outcome["quiescence"], result["quiescence"])
+        self.assertTrue(np.array_equal(series, result["series"]))
+        self.assertEqual(outcome["quiescence"] + 1, len(result["series"]))
+
+    def test_put_round_trips_stuck_run(self):
+        params = dict(_PARAMS, data_prob=0.0, search_prob=0.5)
+        outcome, series = record_replication(params, 1, 20)
+        self.store.put(params, 1, 20, outcome, series)
+
+        self.assertFalse(outcome["quiesced"])
+        self.assertEqual(outcome, self.store.run(params, 1, 20))
+
+    def test_run_only_computes_missing_runs(self):
+        first = self.store.run(_PARAMS, 1, 50)
+
+        with mock.patch("telephone.store.record_replication") as record:
+            self.assertEqual(first, self.store.run(_PARAMS, 1, 50))
+            record.assert_not_called()
+
+    def test_unseeded_runs_are_rejected(self):
+        with mock.patch("telephone.store.record_replication") as record:
+            self.assertRaises(ValueError, self.store.run, _PARAMS, None, 50)
+            record.assert_not_called()
+
+        outcome, series = record_replication(_PARAMS, 1, 50)
+        self.assertRaises(ValueError, self.store.put, _PARAMS, None, 50,
+                          outcome, series)
+        self.assertEqual(0, len(self.store))
+
+    def test_results_persist_across_stores(self):
+        self.store.run(_PARAMS, 1, 50)
+        self.store.close()
+
+        self.store = ResultStore(self.path)
+        self.assertEqual(1, len(self.store))
+        self.assertIsNotNone(self.store.get(_PARAMS, 1, 50))
+
+    def test_query_matches_parameters(self):
+        self.store.run(_PARAMS, 1, 50)
+        self.store.run(_PARAMS, 2, 50)
+        self.store.run(dict(_PARAMS, mu=2), 1, 50)
+
+        self.assertEqual(3, len(self.store.query()))
+        self.assertEqual([1, 2], [result["seed"] for result in
+                                  self.store.query(mu=4, max_steps=50)])
+        self.assertEqual([], self.store.query(max_steps=10))
+        self.assertEqual([], self.store.query(mu=4.5))
+        self.assertEqual(3, len(self.store.query(require_mutual=False,
+                                                 recip_prob=0.5)))
+        self.assertEqual([], self.store.query(unknown=1))
+
+    def test_evict_removes_least_recently_used(self):
+        for seed in range(3):
+            self.store.run(_PARAMS, seed, 50)
+        self.store.get(_PARAMS, 0, 50)
+
+        self.store.evict(self.store.size() - 1)
+        self.assertEqual(2, len(self.store))
+        self.assertIsNone(self.store.get(_PARAMS, 1, 50))
+        self.assertIsNotNone(self.store.get(_PARAMS, 0, 50))
+
+    def test_access_times_are_written_lazily(self):
+        for seed in range(3):
+            self.store.run(_PARAMS, seed, 50)
+
+        def accessed():
+            with closing(sqlite3.connect(self.path)) as connection:
+                return connection.execute(
+                    "SELECT seed FROM runs ORDER BY accessed").fetchall()
+
+        self.store.get(_PARAMS, 0, 50)
+        self.assertEqual([(0,), (1,), (2,)], accessed())
+
+        self.store.close()
+        self.assertEqual([(1,), (2,), (0,)], accessed())
+
+        self.store = ResultStore(self.path)
+        self.store.evict(self.store.size() - 1)
+        self.assertIsNone(self.store.get(_PARAMS, 1, 50))
+
+    def test_put_respects_maximum_size(self):
+        self.store.max_bytes = 1
+        self.store.run(_PARAMS, 1, 50)
+        self.assertEqual(0, len(self.store))
+
+    def test_runner_reuses_stored_replications(self):
+        kwargs = {"batch_size": 3, "min_replications": 3,
+                  "max_replications": 6, "max_steps": 50, "max_workers": 1,
+                  "store": self.store}
+        expected = AdaptiveRunner([_PARAMS], {"knowing": 0.0},
+                                  **kwargs).run()
+        self.assertEqual(6, len(self.store))
+
+        with mock.patch("telephone.store.record_replication") as record:
+            actual = AdaptiveRunner([_PARAMS], {"knowing": 0.0},
+                                    **kwargs).run()
+            record.assert_not_called()
+        self.assertEqual(expected[0]["knowing"].mean,
+                         actual[0]["knowing"].mean)
+
+    def test_parallel_runner_stores_replications(self):
+        runner = AdaptiveRunner([_PARAMS], {"knowing": 0.0}, batch_size=2,
+                                min_replications=2, max_replications=4,
+                                max_steps=50, max_workers=2, store=self.store)
+
+        runner.run()
+        self.assertEqual(4, len(self.store))
+
+    def test_edge_list_contents_are_part_of_key(self):
+        path = os.path.join(self.directory.name, "edges.txt")
+        params = dict(_PARAMS, network="edge-list", edge_list=path,
+                      search_prob=1.0, data_prob=0.0)
+
+        with open(path, "w") as edges:
+            edges.write("0 1\n")
+        before = run_key(params, 1, 50, "v")
+        self.store.run(params, 1, 50)
+
+        with open(path, "w") as edges:
+            edges.write("0 2\n")
+        self.assertNotEqual(before, run_key(params, 1, 50, "v"))
+        self.assertIsNone(self.store.get(params, 1, 50))